@@ -1,9 +1,17 @@
-from flask import Flask
-from flask_login import LoginManager
+import hmac
+import os
+from functools import wraps
+
+import click
+from flask import Flask, jsonify, request
+from sqlalchemy.schema import CreateIndex
+from flask_login import LoginManager, login_required
 from datetime import datetime
 
 from config import Config
-from .models import db, User
+from .models import db
+from .identity import load_session_user
+from .db_engine import configure_engine_options, install_engine_profile
 
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"  # login lazım olduğunda buraya yönlendir
@@ -11,7 +19,8 @@ login_manager.login_view = "auth.login"  # login lazım olduğunda buraya yönle
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Süreç içi kimlik önbelleğinden (bkz. identity.py)
+    return load_session_user(int(user_id))
 
 
 # ---- Akış sayfası için "x saat önce" filtresi ----
@@ -43,34 +52,274 @@ def timesince(value):
     return f"{years} yıl"
 
 
+def _serves_requests():
+    """
+    Uygulama istek karşılamak için mi yükleniyor? WSGI sunucusu ve `flask run`
+    için True; diğer `flask` CLI komutları için False. FLASK_RUN_FROM_CLI her
+    `flask` çağrısında (run dahil) ayarlandığından çalışan komuta bakılır.
+    """
+    if not os.environ.get("FLASK_RUN_FROM_CLI"):
+        return True
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.command.name == "run"
+
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
     # Veritabanı ve login
+    configure_engine_options(app)
     db.init_app(app)
+    install_engine_profile(app, db)
     login_manager.init_app(app)
 
+    # HTML parça önbelleğinin boyutu (bkz. fragment_cache.py)
+    from .fragment_cache import fragment_cache
+
+    fragment_cache.max_bytes = app.config.get("FRAGMENT_CACHE_MAX_BYTES", fragment_cache.max_bytes)
+
     # Jinja filtresi kaydı
     app.jinja_env.filters["timesince"] = timesince
+    # Derlenmiş (hash'li, sıkıştırılmış) statik dosyalar, bkz. assets.py
+    from .assets import asset_url
+
+    app.jinja_env.globals["asset_url"] = asset_url
+    # Poster / avatar görselleri yerel vekil üzerinden, bkz. image_proxy.py
+    from .image_proxy import image_url
+
+    app.jinja_env.globals["image_url"] = image_url
 
     # Blueprint'ler
     from .auth.routes import bp as auth_bp
     from .feed.routes import bp as feed_bp
     from .content.routes import bp as content_bp
     from .profile.routes import bp as profile_bp
+    from .assets import bp as assets_bp
+    from .image_proxy import bp as images_bp
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(feed_bp)  # ana sayfa
     app.register_blueprint(content_bp, url_prefix="/content")
     app.register_blueprint(profile_bp, url_prefix="/profile")
+    app.register_blueprint(assets_bp)
+    app.register_blueprint(images_bp)
+
+    # Arka plan iş handler'larını kaydet
+    from . import enrichment  # noqa: F401
+
+    # Yazarken arama indeksi açılışta, istek yolunun dışında kurulur.
+    # Diğer `flask` komutlarında (init-db, run-worker, ...) gerekmez; orada ilk kullanımda kurulur.
+    if app.config.get("AUTOCOMPLETE_PRELOAD", True) and _serves_requests():
+        from .autocomplete import start_loader
+
+        start_loader(app)
+
+    def health_endpoint(view):
+        """İzleme uçları: X-Health-Token başlığı HEALTH_TOKEN ile eşleşmeli ya da oturum açılmış olmalı."""
+        @wraps(view)
+        def guarded():
+            token = app.config.get("HEALTH_TOKEN")
+            if token and hmac.compare_digest(request.headers.get("X-Health-Token", ""), token):
+                return view()
+            return login_required(view)()
+        return guarded
+
+    # Dış servislerin devre durumu + önbellek sayaçları (izleme için)
+    @app.route("/health/upstreams")
+    @health_endpoint
+    def upstreams_health():
+        from .external_api import upstream_status
+
+        return jsonify(upstream_status())
+
+    # HTML parça önbelleği isabet / boyut sayaçları
+    @app.route("/health/fragments")
+    @health_endpoint
+    def fragments_health():
+        from .fragment_cache import fragment_cache
+
+        return jsonify(fragment_cache.snapshot())
+
+    # İş kuyruğu derinliği ve gecikmeleri
+    @app.route("/health/jobs")
+    @health_endpoint
+    def jobs_health():
+        from .jobs import queue_stats
+
+        return jsonify(queue_stats())
 
     # Basit bir CLI komutu: veritabanı tablolarını oluştur
     @app.cli.command("init-db")
     def init_db():
+        from .catalog_ingest import ensure_content_indexes, DuplicateContentError
+        from .content_stats import fill_missing_content_stats
+        from .counters import ensure_counter_columns
+        from .shelves import ensure_shelf_column
+
         with app.app_context():
+            # Tekil (source, external_id) indeksi çift kayıtlarda kurulamaz; hiçbir
+            # şey değiştirilmeden önce kontrol edilir
+            try:
+                ensure_content_indexes()
+            except DuplicateContentError as e:
+                raise click.ClickException(str(e))
             db.create_all()
+            # create_all var olan tablolara sonradan eklenen sütunları da eklemez
+            added = ensure_counter_columns()
+            ensure_shelf_column()
+            stats_added = fill_missing_content_stats()
+            db.session.commit()
+            # create_all var olan tablolara sonradan eklenen indeksleri oluşturmaz
+            with db.engine.begin() as connection:
+                for table in db.metadata.sorted_tables:
+                    for index in table.indexes:
+                        connection.execute(CreateIndex(index, if_not_exists=True))
+        if added:
+            print(f"Added columns: {', '.join(added)}. Run `flask recount` to fill them.")
+        if stats_added:
+            print(f"Content stats filled for {stats_added} contents.")
         print("Database initialized.")
 
+    @app.cli.command("rebuild-timeline")
+    def rebuild_timeline():
+        from .timeline import rebuild_timelines
+
+        count = rebuild_timelines()
+        print(f"Timelines rebuilt for {count} users.")
+
+    @app.cli.command("recount")
+    def recount():
+        from .counters import recount_all
+
+        activities_fixed, users_fixed = recount_all()
+        print(f"Counters repaired: {activities_fixed} activities, {users_fixed} users.")
+
+    @app.cli.command("rebuild-stats")
+    def rebuild_stats():
+        from .content_stats import rebuild_content_stats
+
+        count = rebuild_content_stats()
+        print(f"Content stats rebuilt for {count} contents.")
+
+    @app.cli.command("rebuild-search")
+    def rebuild_search():
+        from .search_index import rebuild_search_index
+
+        count = rebuild_search_index()
+        print(f"Search index rebuilt for {count} contents.")
+
+    @app.cli.command("run-worker")
+    def run_worker():
+        from .jobs import work
+
+        print("Job worker started (Ctrl+C to stop).")
+        work(app)
+
+    @app.cli.command("jobs-stats")
+    def jobs_stats():
+        from .jobs import queue_stats
+
+        stats = queue_stats()
+        depth = stats["depth"]
+        print(
+            "Jobs: {pending} pending, {running} running, {done} done, {failed} failed.".format(**depth)
+        )
+        print(f"Oldest ready job age: {stats['oldest_ready_age']} s")
+        for key, value in stats["last_hour"].items():
+            print(f"  {key}: {value}")
+
+    @app.cli.command("backfill-shelves")
+    def backfill_shelves_command():
+        from .shelves import backfill_shelves
+
+        users, lists = backfill_shelves()
+        print(f"Shelf roles assigned to {lists} lists of {users} users.")
+
+    @app.cli.command("ingest")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--source", type=click.Choice(["tmdb", "openlibrary"]), required=True)
+    @click.option("--batch-size", default=5000, show_default=True)
+    @click.option("--checkpoint", default=None, help="Default: <path>.checkpoint")
+    @click.option("--restart", is_flag=True, help="Ignore the checkpoint and start over.")
+    @click.option("--limit", default=None, type=int, help="Stop after this many rows.")
+    def ingest(path, source, batch_size, checkpoint, restart, limit):
+        from .catalog_ingest import ingest_file, DuplicateContentError
+
+        try:
+            result = ingest_file(
+                path,
+                source,
+                batch_size=batch_size,
+                checkpoint_path=checkpoint,
+                resume=not restart,
+                limit=limit,
+            )
+        except DuplicateContentError as e:
+            raise click.ClickException(str(e))
+        rate = result["rows"] / result["seconds"] if result["seconds"] else 0
+        print(
+            f"Ingested {result['rows']} rows from {result['lines']} lines "
+            f"({result['skipped']} skipped) in {result['seconds']:.1f} s, {rate:.0f} rows/s."
+        )
+
+    @app.cli.command("query-audit")
+    @click.option("--verbose", is_flag=True, help="Print every query plan line.")
+    def query_audit(verbose):
+        from .query_audit import run_query_audit
+
+        checked, problems = run_query_audit(config_class, verbose=verbose)
+        for path, table, detail, sql in problems:
+            print(f"FULL SCAN on {table} ({path}): {detail}\n    {sql}")
+        print(f"Audited {checked} queries, {len(problems)} full table scans.")
+        if problems:
+            raise SystemExit(1)
+
+    @app.cli.command("db-bench")
+    @click.option("--workers", default=4, show_default=True, help="Concurrent processes.")
+    @click.option("--seconds", default=5.0, show_default=True)
+    @click.option("--write-ratio", default=0.2, show_default=True)
+    def db_bench(workers, seconds, write_ratio):
+        from .db_bench import run_db_bench
+
+        results = run_db_bench(config_class, workers=workers, seconds=seconds, write_ratio=write_ratio)
+        for profile, counts in results.items():
+            label = "engine profile" if profile else "defaults"
+            total = counts["reads"] + counts["writes"]
+            print(
+                f"{label:>14}: {total / seconds:7.1f} req/s "
+                f"({counts['reads']} reads, {counts['writes']} writes, {counts['errors']} errors)"
+            )
+
+    @app.cli.command("refresh-similar")
+    @click.option("--full", is_flag=True, help="Recompute every content instead of only changed ones.")
+    def refresh_similar(full):
+        from .recommendations import refresh_similarities
+
+        items, pairs, was_full = refresh_similarities(full=full)
+        kind = "full" if was_full else "incremental"
+        print(f"Similarities refreshed ({kind}): {items} contents, {pairs} neighbour rows.")
+
+    @app.cli.command("bench-similar")
+    @click.option("--ratings", default=1_000_000, show_default=True)
+    @click.option("--users", default=50_000, show_default=True)
+    @click.option("--items", default=20_000, show_default=True)
+    @click.option("--check", default=50, show_default=True, help="Contents verified against a dense computation.")
+    def bench_similar(ratings, users, items, check):
+        from .recommendations import run_similarity_bench
+
+        result = run_similarity_bench(n_ratings=ratings, n_users=users, n_items=items, check=check)
+        for key, value in result.items():
+            print(f"{key:>20}: {value}")
+
+    @app.cli.command("assets")
+    def build_assets_command():
+        from .assets import build_assets
+
+        for name, hashed, raw, minified, gz, br in build_assets(app.static_folder):
+            br_info = f", br {br}" if br is not None else ""
+            print(f"{name} -> dist/{hashed}: {raw} -> {minified} bytes (gzip {gz}{br_info})")
+        print("Assets built.")
+
     # *** ÖNEMLİ: Artık app'i gerçekten döndürüyoruz ***
     return app
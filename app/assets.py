@@ -0,0 +1,170 @@
+"""
+Statik dosya derleme: küçültme, içerik özeti (hash) ve önceden sıkıştırma.
+
+`flask assets` ASSETS listesindeki dosyaları küçültür ve
+static/dist/<yol>.<hash>.<uzantı> olarak yazar. Yanına .gz (ve brotli
+modülü kuruluysa .br) varyantları ile dist/manifest.json eklenir. Şablonlar
+asset_url('css/style.css') ile manifest'teki adı kullanır. Manifest
+yoksa (derleme yapılmamışsa) normal static URL'ine düşülür.
+
+Dosya adı içeriğe göre değiştiği için /assets/ altındaki dosyalar
+"immutable" olarak bir yıl önbelleğe alınabilir. Sunucu istemcinin
+Accept-Encoding başlığına göre hazır .br / .gz dosyasını gönderir; istek
+başına sıkıştırma yapılmaz.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import Blueprint, current_app, request, send_from_directory, url_for, abort
+
+try:
+    import brotli
+except ImportError:  # isteğe bağlı; yoksa yalnızca gzip varyantı üretilir
+    brotli = None
+
+ASSETS = ("css/style.css", "js/main.js")
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+
+# (uzantı, Content-Encoding) — tercih sırasıyla
+ENCODINGS = (("br", "br"), ("gz", "gzip"))
+
+bp = Blueprint("assets", __name__)
+
+_manifest = {"data": None, "mtime": None}
+
+
+# ------------------ KÜÇÜLTME ------------------
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{};:,>])\s*")
+
+
+def minify_css(text):
+    text = _CSS_COMMENT_RE.sub("", text)
+    text = _CSS_SPACE_RE.sub(" ", text)
+    text = _CSS_PUNCT_RE.sub(r"\1", text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text):
+    """
+    Temkinli küçültme: girintiler, boş satırlar ve tam satır // yorumları
+    atılır. Satır sonları korunur (otomatik noktalı virgül kuralları
+    bozulmasın); çok satırlı template literal içindeki satırlara dokunulmaz.
+    """
+    out = []
+    in_template = False
+    for line in text.splitlines():
+        if in_template:
+            out.append(line)
+        else:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("//"):
+                continue
+            out.append(stripped)
+        if line.count("`") % 2:
+            in_template = not in_template
+    return "\n".join(out) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+# ------------------ DERLEME ------------------
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def build_assets(static_folder):
+    """
+    Tüm ASSETS dosyalarını derle, manifest'i yaz.
+    Dönen: [(kaynak, hash'li ad, ham boyut, küçültülmüş, gzip, brotli | None), ...]
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest, report = {}, []
+
+    for name in ASSETS:
+        with open(os.path.join(static_folder, name), encoding="utf-8") as f:
+            source = f.read()
+        root, ext = os.path.splitext(name)
+        data = MINIFIERS.get(ext, lambda t: t)(source).encode("utf-8")
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = f"{root}.{digest}{ext}"
+        path = os.path.join(dist, hashed)
+        _write(path, data)
+
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        _write(path + ".gz", gz)
+        br = None
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            _write(path + ".br", br)
+
+        manifest[name] = hashed
+        report.append((name, hashed, len(source.encode("utf-8")), len(data), len(gz), br and len(br)))
+
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    _manifest["data"] = None  # bu süreçte tekrar okunsun
+    return report
+
+
+# ------------------ ŞABLON YARDIMCISI ------------------
+
+def _load_manifest():
+    path = os.path.join(current_app.static_folder, DIST_DIR, MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if _manifest["data"] is None or _manifest["mtime"] != mtime:
+        with open(path, encoding="utf-8") as f:
+            _manifest["data"] = json.load(f)
+        _manifest["mtime"] = mtime
+    return _manifest["data"]
+
+
+def asset_url(filename):
+    """url_for('static', filename=...) yerine: derlenmişse hash'li, sıkıştırılmış kopya."""
+    hashed = _load_manifest().get(filename)
+    if hashed is None:
+        return url_for("static", filename=filename)
+    return url_for("assets.dist", filename=hashed)
+
+
+# ------------------ SUNUCU ------------------
+
+@bp.route("/assets/<path:filename>")
+def dist(filename):
+    dist_dir = os.path.join(current_app.static_folder, DIST_DIR)
+    if filename == MANIFEST or filename.endswith((".gz", ".br")):
+        abort(404)
+
+    send_name, encoding = filename, None
+    for suffix, content_encoding in ENCODINGS:
+        if request.accept_encodings[content_encoding] and os.path.isfile(
+            os.path.join(dist_dir, f"{filename}.{suffix}")
+        ):
+            send_name, encoding = f"{filename}.{suffix}", content_encoding
+            break
+
+    max_age = current_app.config.get("ASSETS_MAX_AGE", 365 * 24 * 3600)
+    # Tür, sıkıştırılmış dosyanın değil asıl dosyanın uzantısından
+    response = send_from_directory(
+        dist_dir, send_name, mimetype=mimetypes.guess_type(filename)[0], max_age=max_age
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
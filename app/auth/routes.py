@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
-from ..models import db, User, UserList
+from ..models import db, User
+from ..shelves import default_lists_for
+from ..autocomplete import add_user
 
 bp = Blueprint("auth", __name__, template_folder="../templates/auth")
 
@@ -41,15 +43,10 @@ def register():
         db.session.add(user)
         db.session.flush()  # user.id burada oluşsun
 
-        # Varsayılan listeler
-        default_lists = [
-            UserList(user_id=user.id, name="İzlenecek Filmler", list_type="watch", is_default=True),
-            UserList(user_id=user.id, name="İzlenen Filmler", list_type="watch", is_default=True),
-            UserList(user_id=user.id, name="Okunacak Kitaplar", list_type="read", is_default=True),
-            UserList(user_id=user.id, name="Okunan Kitaplar", list_type="read", is_default=True),
-        ]
-        db.session.add_all(default_lists)
+        # Varsayılan listeler (profil rafları)
+        db.session.add_all(default_lists_for(user))
         db.session.commit()
+        add_user(user)
 
         flash("Kayıt başarılı, giriş yapabilirsiniz.", "success")
         return redirect(url_for("auth.login"))
@@ -0,0 +1,205 @@
+"""
+Yazarken arama (autocomplete) için süreç içi önek indeksi.
+
+İçerik başlıkları ve kullanıcı adları katlanmış (fold_text) anahtarlarla
+sıralı listelerde tutulur; önek araması bisect ile O(log n) + sonuç
+sayısı kadar sürer. Başlıklar her kelime başından da indekslenir
+("rings" -> "The Lord of the Rings"). İçerik anahtarları türe göre ayrı
+listelerdedir; tür filtresi diğer türün anahtarlarını gezmez, filtresiz
+arama listeleri sıralı birleştirir.
+
+İndeks uygulama açılırken arka plandaki bir thread'de kurulur ve her
+AUTOCOMPLETE_TTL saniyede bir yeniden kurulur (diğer worker'ların
+eklediği kayıtlar için). Yeni listeler kilit dışında hazırlanıp tek
+atamayla değiştirilir; istekler kurulumu beklemez. İçe aktarma ve kayıt
+işlemleri yeni kaydı artımlı olarak ekler.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from .models import db, Content, User
+from .search_index import fold_text
+
+# Bir başlık için indekslenen en fazla kelime başı (çok uzun başlıklar için sınır)
+MAX_TITLE_WORDS = 6
+
+_lock = threading.Lock()
+_state = {
+    # {"content_keys": {tür: [(anahtar, id), ...]}, "user_keys": [(anahtar, id), ...],
+    #  "contents": {id: (başlık, tür)}, "users": {id: kullanıcı adı}}
+    "index": None,
+    # Kurulum sürerken eklenen kayıtlar; yeni indekse de işlenir
+    "pending": None,
+    "loader": None,
+}
+
+
+def _title_keys(title):
+    words = fold_text(title).split()[:MAX_TITLE_WORDS]
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+def _build():
+    contents, content_keys = {}, {}
+    for cid, title, ctype in Content.query.with_entities(Content.id, Content.title, Content.type):
+        contents[cid] = (title, ctype)
+        content_keys.setdefault(ctype, []).extend((key, cid) for key in _title_keys(title))
+    for keys in content_keys.values():
+        keys.sort()
+
+    users = dict(User.query.with_entities(User.id, User.username))
+    user_keys = sorted((fold_text(name), uid) for uid, name in users.items())
+
+    return {
+        "content_keys": content_keys,
+        "user_keys": user_keys,
+        "contents": contents,
+        "users": users,
+    }
+
+
+def reload_index():
+    """İndeksi veritabanından yeniden kur ve eskisinin yerine koy."""
+    with _lock:
+        _state["pending"] = []
+    try:
+        index = _build()
+    except Exception:
+        with _lock:
+            _state["pending"] = None
+        raise
+    with _lock:
+        for apply in _state["pending"]:
+            apply(index)
+        _state["pending"] = None
+        _state["index"] = index
+
+
+def _loader(app, interval):
+    while True:
+        try:
+            with app.app_context():
+                reload_index()
+                db.session.remove()
+        except Exception as e:
+            print("[AUTOCOMPLETE] indeks yükleme HATA:", e)
+        time.sleep(interval)
+
+
+def start_loader(app):
+    """İndeksi arka planda kur ve AUTOCOMPLETE_TTL aralığıyla yenile."""
+    with _lock:
+        thread = _state["loader"]
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(
+            target=_loader,
+            args=(app, app.config.get("AUTOCOMPLETE_TTL", 300)),
+            name="autocomplete-loader",
+            daemon=True,
+        )
+        _state["loader"] = thread
+    thread.start()
+
+
+def _current_index():
+    """
+    Yüklü indeks. Arka plan yükleyicisi yoksa (ör. AUTOCOMPLETE_PRELOAD kapalı)
+    ilk kullanımda kurulur; yükleyici henüz bitirmediyse None.
+    """
+    index = _state["index"]
+    if index is None:
+        loader = _state["loader"]
+        if loader is not None and loader.is_alive():
+            return None
+        reload_index()
+        index = _state["index"]
+    return index
+
+
+def _prefix_run(keys, prefix):
+    i = bisect_left(keys, (prefix,))
+    while i < len(keys) and keys[i][0].startswith(prefix):
+        yield keys[i]
+        i += 1
+
+
+def _scan(key_lists, prefix, limit):
+    """Önekle başlayan anahtarları (listeler birleşik, sıralı) gez; ilk `limit` farklı id."""
+    found = []
+    for _, row_id in heapq.merge(*(_prefix_run(keys, prefix) for keys in key_lists)):
+        if row_id not in found:
+            found.append(row_id)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def suggest_contents(q, content_type=None, limit=8):
+    """Başlığı (ya da bir kelimesi) q ile başlayan içerikler: [(id, başlık, tür), ...]"""
+    prefix = fold_text(q).strip()
+    if not prefix:
+        return []
+    index = _current_index()
+    if index is None:
+        return []
+    with _lock:
+        by_type = index["content_keys"]
+        if content_type is None:
+            key_lists = list(by_type.values())
+        else:
+            key_lists = [by_type.get(content_type, [])]
+        contents = index["contents"]
+        return [(cid, *contents[cid]) for cid in _scan(key_lists, prefix, limit)]
+
+
+def suggest_users(q, limit=8):
+    """Kullanıcı adı q ile başlayan kullanıcılar: [(id, kullanıcı adı), ...]"""
+    prefix = fold_text(q).strip()
+    if not prefix:
+        return []
+    index = _current_index()
+    if index is None:
+        return []
+    with _lock:
+        users = index["users"]
+        return [(uid, users[uid]) for uid in _scan([index["user_keys"]], prefix, limit)]
+
+
+def _apply(apply):
+    """Değişikliği yüklü indekse, kurulum sürüyorsa yeni indekse de işle."""
+    with _lock:
+        if _state["index"] is not None:
+            apply(_state["index"])
+        if _state["pending"] is not None:
+            _state["pending"].append(apply)
+
+
+def add_content(content):
+    """Yeni içeriği indekse ekle."""
+    cid, title, ctype = content.id, content.title, content.type
+
+    def apply(index):
+        if cid in index["contents"]:
+            return
+        index["contents"][cid] = (title, ctype)
+        keys = index["content_keys"].setdefault(ctype, [])
+        for key in _title_keys(title):
+            insort(keys, (key, cid))
+
+    _apply(apply)
+
+
+def add_user(user):
+    """Yeni kullanıcıyı indekse ekle."""
+    uid, username = user.id, user.username
+
+    def apply(index):
+        if uid in index["users"]:
+            return
+        index["users"][uid] = username
+        insort(index["user_keys"], (fold_text(username), uid))
+
+    _apply(apply)
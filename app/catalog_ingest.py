@@ -0,0 +1,273 @@
+"""
+TMDb / OpenLibrary döküm dosyalarından toplu katalog içe aktarma (`flask ingest`).
+
+Dosya satır satır okunur (gzip de olabilir), her kayıt arama sonuçlarıyla
+aynı eşleyicilerle (map_tmdb_movie / map_openlibrary_doc) Content satırına
+çevrilir ve (source, external_id) üzerinde UPSERT ile büyük executemany
+gruplarında yazılır. Her grup kendi transaction'ında commit edilir; ardından
+işlenen satır numarası checkpoint dosyasına yazılır, kesilen içe aktarma
+aynı komutla kaldığı yerden devam eder.
+
+Desteklenen biçimler:
+  - TMDb günlük ID dökümü (movie_ids_MM_DD_YYYY.json.gz): her satır bir JSON
+  - OpenLibrary editions / works dökümü: "tür \\t key \\t rev \\t tarih \\t JSON"
+    satırları ya da doğrudan JSON satırları
+"""
+import gzip
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from sqlalchemy import select, literal, func, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateIndex
+
+from .models import db, Content, ContentStats
+from .external_api import map_tmdb_movie, map_openlibrary_doc
+from .search_index import index_rows
+
+SOURCE_TYPES = {"tmdb": "movie", "openlibrary": "book"}
+
+_YEAR_RE = re.compile(r"\b(\d{4})\b")
+
+
+def _to_year(value):
+    if value is None:
+        return None
+    match = _YEAR_RE.search(str(value))
+    return int(match.group(1)) if match else None
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _parse_line(line):
+    """JSON satırı ya da OpenLibrary TSV satırının son sütunundaki JSON."""
+    line = line.strip()
+    if not line:
+        return None
+    if not line.startswith("{"):
+        line = line.rsplit("\t", 1)[-1]
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _tmdb_record(record):
+    if record.get("adult") or not record.get("id"):
+        return None
+    return map_tmdb_movie(record)
+
+
+def _openlibrary_record(record):
+    """Döküm kaydını arama dokümanı biçimine getirip map_openlibrary_doc'a ver."""
+    key = record.get("key") or ""
+    kind = (record.get("type") or {}).get("key")
+
+    doc = {
+        "title": record.get("title"),
+        "author_name": record.get("author_names") or [],  # dökümde yazar adı yok, yalnızca anahtar
+        "cover_i": next((c for c in record.get("covers") or [] if c and c > 0), None),
+    }
+    if kind == "/type/edition" or key.startswith("/books/"):
+        doc["edition_key"] = [key.rsplit("/", 1)[-1]]
+        doc["first_publish_year"] = _to_year(record.get("publish_date"))
+    elif kind == "/type/work" or key.startswith("/works/"):
+        doc["key"] = key
+        doc["first_publish_year"] = _to_year(record.get("first_publish_date"))
+    else:
+        return None  # yazar vb. kayıtlar
+
+    if not doc["title"]:
+        return None
+    return map_openlibrary_doc(doc)
+
+
+MAPPERS = {"tmdb": _tmdb_record, "openlibrary": _openlibrary_record}
+
+
+def _to_row(source, item):
+    meta = {"authors": item["authors"]} if item.get("authors") else {}
+    return {
+        "external_id": item["external_id"],
+        "source": source,
+        "type": SOURCE_TYPES[source],
+        "title": item["title"][:255],
+        "year": _to_year(item.get("year")),
+        "poster_url": item.get("poster_url"),
+        "meta_json": json.dumps(meta, ensure_ascii=False),
+    }
+
+
+def _upsert_statement():
+    stmt = sqlite_insert(Content.__table__)
+    excluded = stmt.excluded
+    table = Content.__table__.c
+    return stmt.on_conflict_do_update(
+        index_elements=[table.source, table.external_id],
+        set_={
+            "title": excluded.title,
+            "year": db.func.coalesce(excluded.year, table.year),
+            "poster_url": db.func.coalesce(excluded.poster_url, table.poster_url),
+            # Zenginleştirilmiş meta (yönetmen, oyuncular...) ezilmesin
+            "meta_json": db.func.coalesce(table.meta_json, excluded.meta_json),
+        },
+    )
+
+
+def _write_batch(source, rows):
+    """Grubu UPSERT et; istatistik satırlarını ve arama indeksini güncelle."""
+    # Aynı grupta tekrar eden kayıtlarda sonuncusu kazanır
+    rows = list({row["external_id"]: row for row in rows}.values())
+    db.session.execute(_upsert_statement(), rows)
+
+    in_batch = (Content.source == source) & Content.external_id.in_([r["external_id"] for r in rows])
+    db.session.execute(
+        ContentStats.__table__.insert()
+        .prefix_with("OR IGNORE")
+        .from_select(
+            [
+                "content_id", "type", "rating_sum", "rating_count", "avg_score",
+                "list_count", "review_count", "popularity", "updated_at",
+            ],
+            select(
+                Content.id, Content.type, literal(0), literal(0), literal(0.0),
+                literal(0), literal(0), literal(0), literal(datetime.utcnow(), db.DateTime),
+            ).where(in_batch),
+        )
+    )
+    index_rows(
+        db.session.execute(
+            select(Content.id, Content.title, Content.year, Content.meta_json).where(in_batch)
+        ).all()
+    )
+    db.session.commit()
+    return len(rows)
+
+
+def _read_checkpoint(checkpoint_path, size):
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if state.get("size") != size:
+        print("Checkpoint belongs to a different file version, starting over.")
+        return 0
+    return int(state.get("line", 0))
+
+
+def _write_checkpoint(checkpoint_path, size, line_no):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"size": size, "line": line_no}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+UNIQUE_SOURCE_INDEX = "uq_contents_source_external"
+
+
+class DuplicateContentError(Exception):
+    """contents'ta aynı (source, external_id) ile birden fazla satır var; tekil indeks kurulamaz."""
+
+    def __init__(self, duplicates):
+        self.duplicates = duplicates
+        lines = [
+            f"  {source} {external_id}: content ids {ids}"
+            for source, external_id, ids in duplicates
+        ]
+        super().__init__(
+            f"Cannot create {UNIQUE_SOURCE_INDEX}: duplicate (source, external_id) rows "
+            f"in contents. Merge or delete them first:\n" + "\n".join(lines)
+        )
+
+
+def _duplicate_contents(connection, limit=50):
+    """Aynı (source, external_id) çiftine sahip içerikler: [(source, external_id, "id,id"), ...]"""
+    return connection.execute(
+        select(Content.source, Content.external_id, func.group_concat(Content.id, ","))
+        .group_by(Content.source, Content.external_id)
+        .having(func.count(Content.id) > 1)
+        .order_by(Content.source, Content.external_id)
+        .limit(limit)
+    ).all()
+
+
+def ensure_content_indexes():
+    """
+    contents indekslerini oluştur. Tekil (source, external_id) indeksi henüz yoksa
+    önce çift kayıtlara bakılır (eski sürümler tekilliği yalnızca uygulamada
+    sağlıyordu); varsa hiçbir şey değiştirmeden DuplicateContentError.
+    """
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table(Content.__tablename__):
+            return
+        existing = {index["name"] for index in inspector.get_indexes(Content.__tablename__)}
+        if UNIQUE_SOURCE_INDEX not in existing:
+            duplicates = _duplicate_contents(connection)
+            if duplicates:
+                raise DuplicateContentError(duplicates)
+        for index in Content.__table__.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def ingest_file(path, source, batch_size=5000, checkpoint_path=None, resume=True, limit=None):
+    """
+    Döküm dosyasını içe aktar. Dönen: {"lines", "rows", "skipped", "seconds"}
+    """
+    mapper = MAPPERS[source]
+    checkpoint_path = checkpoint_path or path + ".checkpoint"
+    size = os.path.getsize(path)
+    start_line = _read_checkpoint(checkpoint_path, size) if resume else 0
+    if start_line:
+        print(f"Resuming after line {start_line}.")
+
+    # Eski veritabanlarında (create_all tabloyu atladıysa) UPSERT için gereken indeks
+    ensure_content_indexes()
+
+    started = time.monotonic()
+    line_no = 0
+    rows_written = skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal rows_written
+        rows_written += _write_batch(source, batch)
+        batch.clear()
+        _write_checkpoint(checkpoint_path, size, line_no)
+        elapsed = time.monotonic() - started
+        print(f"  line {line_no}: {rows_written} rows, {rows_written / elapsed:.0f} rows/s")
+
+    with _open(path) as f:
+        for line_no, line in enumerate(f, start=1):
+            if line_no <= start_line:
+                continue
+            record = _parse_line(line)
+            item = mapper(record) if record else None
+            if item is None:
+                skipped += 1
+            else:
+                batch.append(_to_row(source, item))
+            if len(batch) >= batch_size:
+                flush()
+            if limit and rows_written + len(batch) >= limit:
+                break
+        if batch:
+            flush()
+        else:
+            _write_checkpoint(checkpoint_path, size, line_no)
+
+    return {
+        "lines": line_no - start_line if line_no > start_line else 0,
+        "rows": rows_written,
+        "skipped": skipped,
+        "seconds": time.monotonic() - started,
+    }
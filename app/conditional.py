@@ -0,0 +1,45 @@
+"""
+Koşullu GET (ETag / 304).
+
+Sayfanın ETag'i render edilmeden önce ucuz sürüm damgalarından hesaplanır
+(ör. content_stats.updated_at, akış kartlarının sürümleri). İstemcinin
+If-None-Match başlığı eşleşirse kart hazırlama / şablon render yolu hiç
+çalışmadan 304 döner.
+
+ETag'e her zaman izleyici, tam URL ve bir zaman dilimi
+(CONDITIONAL_GET_BUCKET saniye) girer: "x dakika önce" gibi metinler en
+fazla bu kadar eski kalır. Bekleyen flash mesajı varken ETag üretilmez;
+aksi halde mesajlı sayfa sonraki istekte 304 ile tekrar gösterilirdi.
+"""
+import hashlib
+import time
+
+from flask import current_app, request, session
+from flask_login import current_user
+
+
+def page_etag(*stamps):
+    """Sürüm damgalarından ETag; bekleyen flash mesajı varsa None."""
+    if session.get("_flashes"):
+        return None
+    bucket = int(time.time() // current_app.config.get("CONDITIONAL_GET_BUCKET", 60))
+    viewer = current_user.get_id() if current_user.is_authenticated else None
+    raw = repr((request.full_path, viewer, bucket, stamps))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def not_modified(etag):
+    """İstemcideki kopya güncelse 304 yanıtı, değilse None."""
+    if etag is None or not request.if_none_match.contains(etag):
+        return None
+    response = current_app.response_class(status=304)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    response = current_app.make_response(response)
+    if etag is not None:
+        response.set_etag(etag)
+        # Kişiye özel sayfa: paylaşılan önbellekte tutulmaz, her seferinde doğrulanır
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
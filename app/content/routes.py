@@ -1,13 +1,40 @@
 import json
+import zlib
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from ..models import db, Content, Rating, Review, Activity, UserList, ListItem
-from ..external_api import get_tmdb_movie_details
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import joinedload
+from ..models import db, Content, ContentStats, ContentSimilarity, Rating, Review, Activity, UserList, ListItem
+from ..jobs import enqueue, has_pending, wake_worker
+from ..enrichment import ENRICH_TMDB
+from ..image_proxy import WARM_IMAGES, is_proxied
+from ..timeline import fan_out_activity
+from ..content_stats import apply_stats_delta
+from ..counters import bump_rating_activities, bump_list_item_activities
+from ..search_index import index_content
+from ..autocomplete import add_content
+from ..fragment_cache import fragment_cache
+from ..conditional import page_etag, not_modified, with_etag
+from ..pagination import encode_cursor, decode_time_cursor, keyset_page
 
 # Blueprint burada tanımlanıyor
 bp = Blueprint("content", __name__, template_folder="../templates/content")
 
 
+def _record_activity(content, activity_type, ref_id):
+    """Activity kaydı oluştur ve takipçilerin akışına dağıt."""
+    act = Activity(
+        user_id=current_user.id,
+        content_id=content.id,
+        activity_type=activity_type,
+        ref_id=ref_id,
+    )
+    db.session.add(act)
+    db.session.flush()  # act.id + created_at için
+    fan_out_activity(act)
+    return act
+
+
 @bp.route("/import", methods=["POST"])
 @login_required
 def import_external():
@@ -17,6 +44,7 @@ def import_external():
     title = request.form.get("title", "").strip()
     year_str = request.form.get("year", "").strip()
     poster_url = request.form.get("poster_url", "").strip() or None
+    authors = request.form.get("authors", "").strip()
 
     if not (external_id and source and ctype and title):
         flash("Eksik veri alındı, içerik eklenemedi.", "danger")
@@ -43,11 +71,9 @@ def import_external():
     # --- meta bilgiyi hazırlayalım ---
     meta = {}
 
-    # Kaynak TMDb ve tür film ise ekstra verileri çek
-    if source == "tmdb" and ctype == "movie":
-        details = get_tmdb_movie_details(external_id)
-        if details:
-            meta.update(details)
+    # OpenLibrary arama sonucundaki yazarlar (aramada kullanılıyor)
+    if authors:
+        meta["authors"] = authors
 
     content = Content(
         external_id=external_id,
@@ -59,51 +85,110 @@ def import_external():
         meta_json=json.dumps(meta, ensure_ascii=False)
     )
     db.session.add(content)
+    db.session.flush()  # content.id için
+    apply_stats_delta(content)  # keşfet listelerinde görünsün diye boş istatistik satırı
+    index_content(content)
+
+    # TMDb detayları (yönetmen, oyuncular...) arka planda çekilir; sayfa beklemez
+    enrich = source == "tmdb" and ctype == "movie"
+    if enrich:
+        enqueue(ENRICH_TMDB, {"content_id": content.id}, ref_id=content.id)
+    # Kapak küçük boyutları da arka planda hazırlansın (bkz. image_proxy.py)
+    warm = is_proxied(poster_url)
+    if warm:
+        enqueue(WARM_IMAGES, {"url": poster_url}, ref_id=content.id)
     db.session.commit()
+    add_content(content)
+    if enrich or warm:
+        wake_worker()
 
     flash("İçerik başarıyla sisteme eklendi.", "success")
     return redirect(url_for("content.detail", content_id=content.id))
 
 
+REVIEWS_PER_PAGE = 20
+SIMILAR_LIMIT = 8
+
+
+def _parse_meta(content):
+    """TMDb/OpenLibrary meta verisini çöz."""
+    if not content.meta_json:
+        return {}
+    try:
+        return json.loads(content.meta_json)
+    except json.JSONDecodeError:
+        return {}
+
+
+def _content_stats(content):
+    """
+    (ortalama puan | None, puan sayısı, yorum sayısı)
+    content_stats satırı olmayan eski içerikler için SQL ile hesaplanır.
+    """
+    stats = db.session.get(ContentStats, content.id)
+    if stats is not None:
+        avg = stats.avg_score if stats.rating_count else None
+        return avg, stats.rating_count, stats.review_count
+
+    avg, count = (
+        db.session.query(func.avg(Rating.score), func.count(Rating.id))
+        .filter(Rating.content_id == content.id)
+        .one()
+    )
+    review_count = (
+        db.session.query(func.count(Review.id)).filter(Review.content_id == content.id).scalar()
+    )
+    return avg, count, review_count
+
+
+def _info_cache_key(content, stats):
+    # Puan / yorum sayaçları ya da meta (zenginleştirme) değişince anahtar da değişir
+    meta_version = zlib.crc32((content.meta_json or "").encode("utf-8"))
+    return ("content-info", content.id, stats, meta_version, content.title, content.year)
+
+
+def _reviews_page(content, cursor):
+    query = (
+        Review.query
+        .options(joinedload(Review.user))
+        .filter(Review.content_id == content.id)
+    )
+    after = decode_time_cursor(cursor)
+    if after:
+        query = query.filter(tuple_(Review.created_at, Review.id) < after)
+    reviews, has_next = keyset_page(
+        query.order_by(Review.created_at.desc(), Review.id.desc()), REVIEWS_PER_PAGE
+    )
+    next_cursor = None
+    if has_next:
+        last = reviews[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return reviews, next_cursor
+
+
+def _similar_contents(content):
+    """Benzer içerikler (bkz. recommendations.py): (content_id, score) indeksinden tek sorgu."""
+    return (
+        Content.query
+        .join(ContentSimilarity, ContentSimilarity.similar_id == Content.id)
+        .filter(ContentSimilarity.content_id == content.id)
+        .order_by(ContentSimilarity.score.desc())
+        .limit(SIMILAR_LIMIT)
+        .all()
+    )
+
+
 @bp.route("/<int:content_id>", methods=["GET", "POST"])
 @login_required
 def detail(content_id):
     content = Content.query.get_or_404(content_id)
 
-    # TMDb/OpenLibrary meta verisini çöz
-    meta = {}
-    if content.meta_json:
-        try:
-            meta = json.loads(content.meta_json)
-        except json.JSONDecodeError:
-            meta = {}
-
     # Kullanıcının kendi puanı
     user_rating = Rating.query.filter_by(
         user_id=current_user.id,
         content_id=content.id
     ).first()
 
-    # Ortalama puan
-    ratings = Rating.query.filter_by(content_id=content.id).all()
-    avg_rating = None
-    if ratings:
-        avg_rating = sum(r.score for r in ratings) / len(ratings)
-
-    # Yorumlar (yeniden eskiye)
-    reviews = (
-        Review.query.filter_by(content_id=content.id)
-        .order_by(Review.created_at.desc())
-        .all()
-    )
-
-    # Kullanıcının bu içerik türü için listeleri
-    list_type = "watch" if content.type == "movie" else "read"
-    user_lists = UserList.query.filter_by(
-        user_id=current_user.id,
-        list_type=list_type
-    ).all()
-
     if request.method == "POST":
         # ----------------- LİSTEYE EKLE / ÇIKAR -----------------
         if "list_id" in request.form:
@@ -129,7 +214,9 @@ def detail(content_id):
 
             if existing:
                 # Listeden çıkarma
+                bump_list_item_activities(existing.id)  # önbellekteki kart öğeyi göstermesin
                 db.session.delete(existing)
+                apply_stats_delta(content, list_count=-1)
                 db.session.commit()
                 flash("İçerik listeden çıkarıldı.", "info")
             else:
@@ -138,13 +225,8 @@ def detail(content_id):
                 db.session.add(item)
                 db.session.flush()  # item.id için
 
-                act = Activity(
-                    user_id=current_user.id,
-                    content_id=content.id,
-                    activity_type="list_add",
-                    ref_id=item.id,   # ÖNEMLİ: ListItem.id
-                )
-                db.session.add(act)
+                _record_activity(content, "list_add", item.id)  # ÖNEMLİ: ListItem.id
+                apply_stats_delta(content, list_count=1)
                 db.session.commit()
 
                 flash("İçerik listeye eklendi.", "success")
@@ -164,7 +246,9 @@ def detail(content_id):
                 return redirect(url_for("content.detail", content_id=content.id))
 
             if user_rating:
+                apply_stats_delta(content, rating_sum=score - user_rating.score)
                 user_rating.score = score
+                bump_rating_activities(user_rating.id)  # eski akış kartları yeni puanı göstersin
                 # mevcut rating'in id'si zaten var
             else:
                 user_rating = Rating(
@@ -174,15 +258,10 @@ def detail(content_id):
                 )
                 db.session.add(user_rating)
                 db.session.flush()  # user_rating.id üretildi
+                apply_stats_delta(content, rating_sum=score, rating_count=1)
 
             # Her puan vermede bir Activity kaydı
-            act = Activity(
-                user_id=current_user.id,
-                content_id=content.id,
-                activity_type="rating",
-                ref_id=user_rating.id,  # ÖNEMLİ: Rating.id
-            )
-            db.session.add(act)
+            _record_activity(content, "rating", user_rating.id)  # ÖNEMLİ: Rating.id
 
             db.session.commit()
             flash("Puanınız kaydedildi.", "success")
@@ -203,24 +282,70 @@ def detail(content_id):
             db.session.add(review)
             db.session.flush()  # review.id için
 
-            act = Activity(
-                user_id=current_user.id,
-                content_id=content.id,
-                activity_type="review",
-                ref_id=review.id,  # ÖNEMLİ: Review.id
-            )
-            db.session.add(act)
+            _record_activity(content, "review", review.id)  # ÖNEMLİ: Review.id
+            apply_stats_delta(content, review_count=1)
             db.session.commit()
 
             flash("Yorumunuz kaydedildi.", "success")
             return redirect(url_for("content.detail", content_id=content.id))
 
-    return render_template(
-        "content/detail.html",
-        content=content,
-        user_rating=user_rating,
-        avg_rating=avg_rating,
-        reviews=reviews,
-        user_lists=user_lists,
-        meta=meta
-    )
\ No newline at end of file
+    # Puan, yorum ve liste yazmaları content_stats.updated_at'i ilerletir; bu damga
+    # eşleşirse yorumlar / listeler yüklenmeden ve render edilmeden 304 döner
+    etag = None
+    stats_row = db.session.get(ContentStats, content.id)
+    if stats_row is not None:
+        etag = page_etag(
+            stats_row.updated_at,
+            _info_cache_key(content, None),
+            content.poster_url,
+            user_rating.score if user_rating else None,
+        )
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    # Puan ortalaması / sayıları content_stats'tan (yazma anında SQL ile güncellenir)
+    stats = _content_stats(content)
+
+    # Statik bilgi bloğu (başlık, puan özeti, meta) içerik sürümüne göre önbellekte
+    info_html = fragment_cache.get_or_render(
+        _info_cache_key(content, stats),
+        lambda: render_template("content/_detail_info.html", content=content, stats=stats, meta=_parse_meta(content)),
+    )
+
+    # Yorumlar (yeniden eskiye), keyset sayfalama
+    reviews, next_reviews_cursor = _reviews_page(content, request.args.get("reviews_cursor", ""))
+
+    # Kullanıcının bu içerik türü için listeleri ve içeriğin bulunduğu listeler (tek sorgu)
+    list_type = "watch" if content.type == "movie" else "read"
+    user_lists = UserList.query.filter_by(
+        user_id=current_user.id,
+        list_type=list_type
+    ).all()
+    member_list_ids = set()
+    if user_lists:
+        member_list_ids = {
+            list_id
+            for (list_id,) in ListItem.query
+            .with_entities(ListItem.list_id)
+            .filter(
+                ListItem.content_id == content.id,
+                ListItem.list_id.in_([lst.id for lst in user_lists]),
+            )
+        }
+
+    return with_etag(
+        render_template(
+            "content/detail.html",
+            content=content,
+            user_rating=user_rating,
+            info_html=info_html,
+            reviews=reviews,
+            next_reviews_cursor=next_reviews_cursor,
+            user_lists=user_lists,
+            member_list_ids=member_list_ids,
+            similar=_similar_contents(content),
+            enrichment_pending=has_pending(ENRICH_TMDB, content.id),
+        ),
+        etag,
+    )
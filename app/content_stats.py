@@ -0,0 +1,118 @@
+"""
+content_stats tablosunun bakımı.
+
+Puan, yorum ve liste yazmaları ilgili içeriğin istatistik satırını aynı
+transaction içinde tek bir UPSERT ile günceller; keşfet listeleri bu
+tablodan (type, avg_score) / (type, popularity) indeksleriyle okunur.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, func, case, delete, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import db, Content, ContentStats, Rating, Review, ListItem
+
+
+def apply_stats_delta(content, rating_sum=0, rating_count=0, list_count=0, review_count=0):
+    """İçeriğin istatistiklerine farkları ekle (satır yoksa oluşturulur)."""
+    now = datetime.utcnow()
+    stmt = sqlite_insert(ContentStats).values(
+        content_id=content.id,
+        type=content.type,
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        avg_score=(rating_sum / rating_count) if rating_count else 0,
+        list_count=list_count,
+        review_count=review_count,
+        popularity=list_count + review_count,
+        updated_at=now,
+    )
+
+    new_sum = ContentStats.rating_sum + rating_sum
+    new_count = ContentStats.rating_count + rating_count
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ContentStats.content_id],
+        set_={
+            "rating_sum": new_sum,
+            "rating_count": new_count,
+            "avg_score": case((new_count > 0, new_sum * 1.0 / new_count), else_=0),
+            "list_count": ContentStats.list_count + list_count,
+            "review_count": ContentStats.review_count + review_count,
+            "popularity": ContentStats.popularity + list_count + review_count,
+            "updated_at": now,
+        },
+    )
+    db.session.execute(stmt)
+
+
+STATS_COLUMNS = [
+    "content_id", "type", "rating_sum", "rating_count", "avg_score",
+    "list_count", "review_count", "popularity", "updated_at",
+]
+
+
+def _stats_rows():
+    """Her içerik için istatistik satırı (STATS_COLUMNS sırasıyla) üreten SELECT."""
+    rating_subq = (
+        select(
+            Rating.content_id,
+            func.sum(Rating.score).label("rating_sum"),
+            func.count(Rating.id).label("rating_count"),
+        )
+        .group_by(Rating.content_id)
+        .subquery()
+    )
+    list_subq = (
+        select(ListItem.content_id, func.count(ListItem.id).label("list_count"))
+        .group_by(ListItem.content_id)
+        .subquery()
+    )
+    review_subq = (
+        select(Review.content_id, func.count(Review.id).label("review_count"))
+        .group_by(Review.content_id)
+        .subquery()
+    )
+
+    rating_sum = func.coalesce(rating_subq.c.rating_sum, 0)
+    rating_count = func.coalesce(rating_subq.c.rating_count, 0)
+    list_count = func.coalesce(list_subq.c.list_count, 0)
+    review_count = func.coalesce(review_subq.c.review_count, 0)
+
+    rows = (
+        select(
+            Content.id,
+            Content.type,
+            rating_sum,
+            rating_count,
+            case((rating_count > 0, rating_sum * 1.0 / rating_count), else_=0),
+            list_count,
+            review_count,
+            list_count + review_count,
+            literal(datetime.utcnow(), db.DateTime),
+        )
+        .outerjoin(rating_subq, rating_subq.c.content_id == Content.id)
+        .outerjoin(list_subq, list_subq.c.content_id == Content.id)
+        .outerjoin(review_subq, review_subq.c.content_id == Content.id)
+    )
+    return rows
+
+
+def rebuild_content_stats():
+    """Tüm istatistikleri ratings / reviews / list_items tablolarından yeniden hesapla."""
+    db.session.execute(delete(ContentStats))
+    db.session.execute(ContentStats.__table__.insert().from_select(STATS_COLUMNS, _stats_rows()))
+    db.session.commit()
+    return db.session.query(func.count(ContentStats.content_id)).scalar()
+
+
+def fill_missing_content_stats():
+    """
+    İstatistik satırı olmayan içerikler (tablo eklenmeden önceki kayıtlar) için
+    satırları hesaplayıp ekle; keşfet listeleri content_stats ile INNER JOIN
+    yaptığından bu içerikler aksi halde listelerden düşer. Eklenen satır sayısı.
+    """
+    missing = ~select(ContentStats.content_id).where(ContentStats.content_id == Content.id).exists()
+    result = db.session.execute(
+        ContentStats.__table__.insert().from_select(STATS_COLUMNS, _stats_rows().where(missing))
+    )
+    return result.rowcount
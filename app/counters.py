@@ -0,0 +1,132 @@
+"""
+Denormalize sayaçlar: Activity.like_count / comment_count ve
+User.follower_count / following_count.
+
+Sayaçlar yazma işlemiyle aynı transaction içinde tek bir UPDATE ile
+artırılıp azaltılır; `flask recount` kaymaları toplu olarak düzeltir. Sayaç sütunları olmayan
+eski veritabanlarına sütunlar ensure_counter_columns ile eklenir.
+Aktivite sayaçları değişince Activity.version da artar (akış kartı önbelleği).
+"""
+from sqlalchemy import update, select, func, or_, text
+
+from .models import db, User, Follow, Activity, ActivityLike, ActivityComment
+
+# tablo -> sonradan eklenen sayaç sütunları (INTEGER NOT NULL DEFAULT 0)
+COUNTER_COLUMNS = {
+    "users": ("follower_count", "following_count"),
+    "activities": ("like_count", "comment_count", "version"),
+}
+
+
+def ensure_counter_columns():
+    """
+    Eski veritabanlarında eksik sayaç sütunlarını ekle (tekrar çalıştırılabilir).
+    Dönen: eklenen "tablo.sütun" listesi; eklenenler 0 başlar, `flask recount` doldurur.
+    """
+    added = []
+    for table, columns in COUNTER_COLUMNS.items():
+        existing = {row[1] for row in db.session.execute(text(f"PRAGMA table_info({table})"))}
+        for column in columns:
+            if column not in existing:
+                db.session.execute(
+                    text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+                )
+                added.append(f"{table}.{column}")
+    return added
+
+
+def bump_like_count(activity_id, delta):
+    """Beğeni sayacını değiştir, yeni değeri döndür."""
+    return db.session.execute(
+        update(Activity)
+        .where(Activity.id == activity_id)
+        .values(like_count=Activity.like_count + delta, version=Activity.version + 1)
+        .returning(Activity.like_count)
+    ).scalar()
+
+
+def bump_comment_count(activity_id, delta):
+    """Yorum sayacını değiştir, yeni değeri döndür."""
+    return db.session.execute(
+        update(Activity)
+        .where(Activity.id == activity_id)
+        .values(comment_count=Activity.comment_count + delta, version=Activity.version + 1)
+        .returning(Activity.comment_count)
+    ).scalar()
+
+
+def _bump_ref_activities(activity_type, ref_id):
+    db.session.execute(
+        update(Activity)
+        .where(Activity.activity_type == activity_type, Activity.ref_id == ref_id)
+        .values(version=Activity.version + 1)
+    )
+
+
+def bump_rating_activities(rating_id):
+    """Puan düzenlenince o puanı gösteren aktivite kartlarının sürümünü artır."""
+    _bump_ref_activities("rating", rating_id)
+
+
+def bump_list_item_activities(list_item_id):
+    """Liste öğesi silinince onu gösteren "list_add" kartlarının sürümünü artır."""
+    _bump_ref_activities("list_add", list_item_id)
+
+
+def bump_follow_counts(follower_id, followed_id, delta):
+    """Takip sayaçlarını değiştir, takip edilenin yeni takipçi sayısını döndür."""
+    db.session.execute(
+        update(User)
+        .where(User.id == follower_id)
+        .values(following_count=User.following_count + delta)
+    )
+    return db.session.execute(
+        update(User)
+        .where(User.id == followed_id)
+        .values(follower_count=User.follower_count + delta)
+        .returning(User.follower_count)
+    ).scalar()
+
+
+def recount_all():
+    """
+    Tüm sayaçları kaynak tablolardan yeniden hesapla.
+    Dönen: (düzeltilen aktivite sayısı, düzeltilen kullanıcı sayısı)
+    """
+    ensure_counter_columns()
+    likes = (
+        select(func.count(ActivityLike.id))
+        .where(ActivityLike.activity_id == Activity.id)
+        .scalar_subquery()
+    )
+    comments = (
+        select(func.count(ActivityComment.id))
+        .where(ActivityComment.activity_id == Activity.id)
+        .scalar_subquery()
+    )
+    activities_fixed = db.session.execute(
+        update(Activity)
+        .where(or_(Activity.like_count != likes, Activity.comment_count != comments))
+        .values(like_count=likes, comment_count=comments, version=Activity.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    followers = (
+        select(func.count(Follow.id))
+        .where(Follow.followed_id == User.id)
+        .scalar_subquery()
+    )
+    following = (
+        select(func.count(Follow.id))
+        .where(Follow.follower_id == User.id)
+        .scalar_subquery()
+    )
+    users_fixed = db.session.execute(
+        update(User)
+        .where(or_(User.follower_count != followers, User.following_count != following))
+        .values(follower_count=followers, following_count=following)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    db.session.commit()
+    return activities_fixed, users_fixed
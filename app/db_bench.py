@@ -0,0 +1,101 @@
+"""
+SQLite motor profili için eşzamanlılık ölçümü (`flask db-bench`).
+
+Geçici bir veritabanı örnek veriyle doldurulur; ardından birden fazla
+süreç (gunicorn worker'ları gibi) kendi uygulama örneğiyle aynı dosyaya
+karışık okuma (akış, detay, keşfet) ve yazma (beğeni, yorum) istekleri
+gönderir. Aynı yük motor profili kapalı ve açık olarak iki kez çalıştırılır.
+"""
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from .query_audit import SEED_USERS, seed_sample_data
+
+
+def _bench_config(base_config, db_path, profile):
+    class BenchConfig(base_config):
+        TESTING = False
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+        SQLITE_ENGINE_PROFILE = profile
+        JOBS_WORKER_THREAD = False
+        FEDERATED_SEARCH_SOURCES = ("local",)
+
+    return BenchConfig
+
+
+def _worker(args):
+    config_class, db_path, profile, worker_no, seconds, write_ratio, content_ids, activity_ids = args
+    from . import create_app
+
+    app = create_app(_bench_config(config_class, db_path, profile))
+    client = app.test_client()
+    name = SEED_USERS[0]
+    client.post("/auth/login", data={"email": f"{name}@example.com", "password": "audit-pass"})
+
+    reads = [
+        "/",
+        "/more",
+        "/movies/popular",
+        "/books/top-rated",
+    ] + [f"/content/{cid}" for cid in content_ids]
+
+    rng = random.Random(worker_no)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            if rng.random() < write_ratio:
+                activity_id = rng.choice(activity_ids)
+                if rng.random() < 0.5:
+                    response = client.post(f"/activities/{activity_id}/like")
+                else:
+                    response = client.post(f"/activities/{activity_id}/comment", data={"text": "bench"})
+                key = "writes"
+            else:
+                response = client.get(rng.choice(reads))
+                key = "reads"
+            counts[key if response.status_code < 500 else "errors"] += 1
+        except Exception:
+            counts["errors"] += 1
+    return counts
+
+
+def _run(config_class, workers, seconds, write_ratio):
+    from . import create_app
+    from .models import db, Activity
+
+    tmp_dir = tempfile.mkdtemp(prefix="db-bench-")
+    try:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        bench_config = _bench_config(config_class, db_path, profile=False)
+        app = create_app(bench_config)
+        with app.app_context():
+            db.create_all(bind_key=None)
+        _, content_ids = seed_sample_data(app)
+        with app.app_context():
+            activity_ids = [a.id for a in Activity.query.with_entities(Activity.id)]
+            db.engine.dispose()
+
+        results = {}
+        for profile in (False, True):
+            jobs = [
+                (config_class, db_path, profile, i, seconds, write_ratio, content_ids, activity_ids)
+                for i in range(workers)
+            ]
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                counts = pool.map(_worker, jobs)
+            results[profile] = {
+                key: sum(c[key] for c in counts) for key in ("reads", "writes", "errors")
+            }
+        return results
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def run_db_bench(config_class, workers=4, seconds=5.0, write_ratio=0.2):
+    """Dönen: {profil açık mı: {"reads", "writes", "errors"}}"""
+    return _run(config_class, workers, seconds, write_ratio)
@@ -0,0 +1,133 @@
+"""
+SQLite motor profili: bağlantı PRAGMA'ları ve okuma / yazma havuzlarının ayrılması.
+
+- Her yeni bağlantıda SQLITE_PRAGMAS uygulanır (WAL, busy_timeout,
+  synchronous=NORMAL, mmap_size, cache_size, temp_store).
+- Varsayılan motor "yazıcı"dır: havuzu küçük tutulur (SQLITE_WRITE_POOL_SIZE,
+  varsayılan 1) ve transaction'ları BEGIN IMMEDIATE ile açar. Aynı süreçteki
+  yazmalar SQLite kilidi için yarışmak yerine havuzda sıraya girer; kilit
+  transaction başında alındığı için ortada "database is locked" hatası olmaz.
+- "readonly" bind aynı dosyaya query_only bağlantılar açar
+  (SQLITE_READ_POOL_SIZE). GET / HEAD isteklerindeki sorgular RoutingSession
+  ile buraya gider; WAL sayesinde okuyucular yazıcıyı beklemez.
+
+Bellek içi veritabanlarında (testler) ayrı okuma bind'i kurulmaz.
+"""
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+READONLY_BIND = "readonly"
+READ_METHODS = ("GET", "HEAD")
+_AFTER_COMMIT = "after_commit_callbacks"
+
+
+def _is_file_sqlite(uri):
+    url = make_url(uri)
+    return url.drivername in ("sqlite", "sqlite+pysqlite") and url.database not in (None, "", ":memory:")
+
+
+def configure_engine_options(app):
+    """db.init_app'ten önce: yazıcı havuzu ve okuma bind'inin ayarları."""
+    config = app.config
+    uri = config["SQLALCHEMY_DATABASE_URI"]
+    if not config.get("SQLITE_ENGINE_PROFILE") or not _is_file_sqlite(uri):
+        return
+
+    pool_options = {"max_overflow": 0, "pool_timeout": config.get("SQLITE_POOL_TIMEOUT", 30)}
+
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    options.setdefault("pool_size", config.get("SQLITE_WRITE_POOL_SIZE", 1))
+    for key, value in pool_options.items():
+        options.setdefault(key, value)
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+    read_pool_size = config.get("SQLITE_READ_POOL_SIZE", 0)
+    if read_pool_size:
+        binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+        binds.setdefault(READONLY_BIND, dict(url=uri, pool_size=read_pool_size, **pool_options))
+        config["SQLALCHEMY_BINDS"] = binds
+
+
+def _pragma_statements(pragmas, readonly):
+    for name, value in pragmas.items():
+        if readonly and name == "journal_mode":
+            continue  # salt okunur bağlantı günlük modunu değiştiremez
+        yield f"PRAGMA {name}={value}"
+    if readonly:
+        yield "PRAGMA query_only=ON"
+
+
+def _install_listeners(engine, pragmas, readonly, begin_immediate):
+    statements = list(_pragma_statements(pragmas, readonly))
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # pysqlite'ın kendi BEGIN yönetimini kapat; transaction'ı "begin" olayında açıyoruz
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def on_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE" if begin_immediate else "BEGIN")
+
+
+def install_engine_profile(app, db):
+    """db.init_app'ten sonra: motorlara PRAGMA ve BEGIN dinleyicilerini ekle."""
+    config = app.config
+    if not config.get("SQLITE_ENGINE_PROFILE") or not _is_file_sqlite(config["SQLALCHEMY_DATABASE_URI"]):
+        return
+
+    pragmas = config.get("SQLITE_PRAGMAS", {})
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            readonly = bind_key == READONLY_BIND
+            _install_listeners(
+                engine,
+                pragmas,
+                readonly=readonly,
+                begin_immediate=not readonly and config.get("SQLITE_BEGIN_IMMEDIATE", True),
+            )
+
+
+class RoutingSession(Session):
+    """
+    GET / HEAD isteklerindeki okumaları "readonly" bind'e yönlendirir.
+    Flush, DML ve istek dışındaki işler (CLI, arka plan worker'ı) yazıcıda kalır.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+            and has_request_context()
+            and request.method in READ_METHODS
+        ):
+            engine = self._db.engines.get(READONLY_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def after_commit(self, callback):
+        """
+        callback'i mevcut transaction commit edilince çalıştır; rollback olursa atılır.
+        Süreç içi önbellekler yalnızca kalıcılaşan değişiklikleri görsün diye.
+        Callback içinde veritabanı kullanılmaz (session o anda transaction dışıdır).
+        """
+        self.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _run_after_commit(session):
+    for callback in session.info.pop(_AFTER_COMMIT, ()):
+        callback()
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _drop_after_commit(session):
+    session.info.pop(_AFTER_COMMIT, None)
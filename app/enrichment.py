@@ -0,0 +1,38 @@
+"""
+İçe aktarılan içerikleri dış servislerden gelen bilgilerle zenginleştiren
+arka plan işleri (bkz. jobs.py).
+"""
+import json
+
+from .models import db, Content
+from .external_api import get_tmdb_movie_details, UpstreamError
+from .jobs import handler
+from .search_index import index_content
+
+ENRICH_TMDB = "enrich_tmdb"
+
+
+@handler(ENRICH_TMDB)
+def enrich_tmdb(payload):
+    """TMDb film detaylarını (yönetmen, oyuncular, türler, özet) meta_json'a işle."""
+    content = db.session.get(Content, payload["content_id"])
+    if content is None:
+        return  # içerik silinmiş
+
+    # HTTP isteği sürerken yazma kilidi tutulmasın: transaction'ı kapat
+    external_id = content.external_id
+    db.session.commit()
+
+    # Önceki denemenin önbelleğe düşen hatası (NEGATIVE_CACHE_TTL) tekrar oynatılmasın
+    details = get_tmdb_movie_details(external_id, retry_errors=True)
+    if not details:
+        # Yeniden denensin (UpstreamError -> iş geri çekilmeyle tekrar kuyruğa)
+        raise UpstreamError(f"TMDb detayı alınamadı: {external_id}")
+
+    try:
+        meta = json.loads(content.meta_json) if content.meta_json else {}
+    except json.JSONDecodeError:
+        meta = {}
+    meta.update(details)
+    content.meta_json = json.dumps(meta, ensure_ascii=False)
+    index_content(content)  # yönetmen / oyuncular aramaya girsin
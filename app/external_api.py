@@ -1,5 +1,15 @@
 import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, Counter
+from contextlib import closing
+from urllib.parse import urlsplit
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # --- TMDb Ayarları ---
 TMDB_BASE_URL = "https://api.themoviedb.org/3"
@@ -10,9 +20,386 @@ TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w300"
 TMDB_API_KEY = os.environ.get("TMDB_API_KEY") or "9610f6e5e74d04a07abf3c0e4773cb01"
 
 
+# --- HTTP Ayarları ---
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 5))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))        # servis başına keep-alive bağlantı
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", 0.3))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("BREAKER_RESET_TIMEOUT", 30))
+
+
+class UpstreamError(Exception):
+    """Dış servis hata verdi / yanıt vermedi."""
+
+
+class CircuitOpenError(UpstreamError):
+    """Devre açık: servis bozuk sayılıyor, istek hiç gönderilmedi."""
+
+
+class CircuitBreaker:
+    """
+    Servis başına devre kesici.
+      closed    -> istekler serbest; art arda failure_threshold hata olursa open
+      open      -> reset_timeout boyunca istekler hemen reddedilir
+      half_open -> tek bir deneme isteğine izin verilir; başarılıysa closed, değilse open
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "half_open":
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"[{self.name}] devre açıldı ({self.failures} hata)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "open_for": (
+                    round(time.monotonic() - self.opened_at, 1)
+                    if self.state == "open" else 0
+                ),
+            }
+
+
+class Upstream:
+    """Bir dış servis: havuzlu requests.Session + yeniden deneme + devre kesici."""
+
+    def __init__(self, name):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BREAKER_RESET_TIMEOUT,
+        )
+        retry = Retry(
+            total=HTTP_RETRIES,
+            read=0,  # yavaş yanıtı tekrar beklemeyelim
+            backoff_factor=HTTP_RETRY_BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get_json(self, url, params=None):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} devresi açık")
+
+        try:
+            resp = self.session.get(
+                url, params=params, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+            )
+            print(f"[{self.name}] status:", resp.status_code)  # DEBUG
+            resp.raise_for_status()
+            data = resp.json()
+        except requests.HTTPError as e:
+            # 4xx (429 hariç) servisin sağlığıyla ilgili değil, devreyi etkilemesin
+            status = e.response.status_code if e.response is not None else 500
+            if status < 500 and status != 429:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            print(f"[{self.name}] HATA:", e)  # DEBUG
+            raise UpstreamError(str(e)) from e
+        except (requests.RequestException, ValueError) as e:
+            self.breaker.record_failure()
+            print(f"[{self.name}] HATA:", e)  # DEBUG
+            raise UpstreamError(str(e)) from e
+
+        self.breaker.record_success()
+        return data
+
+    def get_bytes(self, url, max_bytes):
+        """Ham gövde (ör. görsel); max_bytes'tan büyük yanıtlar reddedilir."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} devresi açık")
+
+        try:
+            with self.session.get(
+                url, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), stream=True
+            ) as resp:
+                resp.raise_for_status()
+                chunks, size = [], 0
+                for chunk in resp.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        self.breaker.record_success()  # servis sağlıklı, dosya büyük
+                        raise UpstreamError(f"{url}: {max_bytes} bayttan büyük")
+                    chunks.append(chunk)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else 500
+            if status < 500 and status != 429:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            print(f"[{self.name}] HATA:", e)  # DEBUG
+            raise UpstreamError(str(e)) from e
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            print(f"[{self.name}] HATA:", e)  # DEBUG
+            raise UpstreamError(str(e)) from e
+
+        self.breaker.record_success()
+        return b"".join(chunks)
+
+
+tmdb = Upstream("tmdb")
+openlibrary = Upstream("openlibrary")
+
+# Poster / avatar görselleri (bkz. image_proxy.py): sunucu başına ayrı Upstream,
+# biri bozulunca diğer sunucuların devresi açılmasın
+_image_upstreams = {}
+_image_upstreams_lock = threading.Lock()
+
+
+def image_upstream(url):
+    """Görsel URL'inin sunucusuna ait Upstream (ilk kullanımda oluşturulur)."""
+    host = urlsplit(url).netloc
+    with _image_upstreams_lock:
+        upstream = _image_upstreams.get(host)
+        if upstream is None:
+            upstream = _image_upstreams[host] = Upstream(f"images:{host}")
+        return upstream
+
+
+# --- Önbellek Ayarları ---
+# Varsayılan: proje kökünde api_cache.db (tüm worker'lar aynı dosyayı paylaşır)
+API_CACHE_PATH = os.environ.get("API_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api_cache.db"
+)
+API_CACHE_MAX_ENTRIES = int(os.environ.get("API_CACHE_MAX_ENTRIES", 512))
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", 6 * 3600))       # arama sonuçları
+DETAIL_CACHE_TTL = int(os.environ.get("DETAIL_CACHE_TTL", 7 * 24 * 3600))   # film detayları
+STALE_CACHE_TTL = int(os.environ.get("STALE_CACHE_TTL", 24 * 3600))        # süresi dolmuş ama kullanılabilir
+NEGATIVE_CACHE_TTL = int(os.environ.get("NEGATIVE_CACHE_TTL", 60))         # hatalı yanıtlar
+
+
+class ApiCache:
+    """
+    Dış API yanıtları için iki katmanlı önbellek:
+      - süreç içi LRU (en fazla max_entries kayıt)
+      - worker'lar arası paylaşılan SQLite dosyası
+
+    Süresi dolan kayıt stale_ttl boyunca hemen döndürülür ve arka planda
+    yenilenir (stale-while-revalidate). Hatalar negative_ttl boyunca
+    önbellekte tutulur, böylece çöken bir servis her istekte denenmez.
+    """
+
+    def __init__(self, path, max_entries=512):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = Counter()
+        self._memory = OrderedDict()  # key -> (payload, expires_at, stale_until, is_error)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._disk_ready = False
+        self._writes = 0
+
+    # ---- disk katmanı ----
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._disk_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS api_cache ("
+                " key TEXT PRIMARY KEY, payload TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, stale_until REAL NOT NULL,"
+                " is_error INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._disk_ready = True
+        return conn
+
+    def _disk_get(self, key):
+        try:
+            with closing(self._connect()) as conn:
+                return conn.execute(
+                    "SELECT payload, expires_at, stale_until, is_error FROM api_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            print("[CACHE] disk okuma hatası:", e)
+            return None
+
+    def _disk_set(self, key, entry):
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO api_cache"
+                    " (key, payload, expires_at, stale_until, is_error) VALUES (?, ?, ?, ?, ?)",
+                    (key, *entry),
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    conn.execute("DELETE FROM api_cache WHERE stale_until < ?", (time.time(),))
+        except sqlite3.Error as e:
+            print("[CACHE] disk yazma hatası:", e)
+
+    # ---- bellek katmanı ----
+    def _get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        entry = self._disk_get(key)
+        if entry is not None:
+            self._remember(key, tuple(entry))
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _store(self, key, value, ttl, stale_ttl, is_error=False):
+        now = time.time()
+        entry = (
+            json.dumps(value, ensure_ascii=False),
+            now + ttl,
+            now + ttl + stale_ttl,
+            1 if is_error else 0,
+        )
+        self._remember(key, entry)
+        self._disk_set(key, entry)
+
+    # ---- dışa açık ----
+    def get_or_fetch(self, key, fetch, ttl, stale_ttl=STALE_CACHE_TTL,
+                     negative_ttl=NEGATIVE_CACHE_TTL, default=None, retry_errors=False):
+        """
+        key için önbellekteki değeri döndür; yoksa fetch() ile getirip sakla.
+        fetch hata durumunda UpstreamError fırlatmalı; o zaman default döner.
+        retry_errors: önbellekteki hata kaydını yok say, servisi yeniden dene
+        (yeniden denenen arka plan işleri için).
+        """
+        now = time.time()
+        entry = self._get(key)
+        if entry is not None and retry_errors and entry[3]:
+            entry = None
+        if entry is not None:
+            payload, expires_at, stale_until, is_error = entry
+            if now < expires_at:
+                self.stats["negative_hits" if is_error else "hits"] += 1
+                return default if is_error else json.loads(payload)
+            if not is_error and now < stale_until:
+                self.stats["stale_hits"] += 1
+                self._refresh_in_background(key, fetch, ttl, stale_ttl, negative_ttl)
+                return json.loads(payload)
+
+        self.stats["misses"] += 1
+        return self._fetch_and_store(key, fetch, ttl, stale_ttl, negative_ttl, default, entry)
+
+    def _fetch_and_store(self, key, fetch, ttl, stale_ttl, negative_ttl, default, old_entry=None):
+        try:
+            value = fetch()
+        except UpstreamError as e:
+            self.stats["errors"] += 1
+            if old_entry is not None and not old_entry[3]:
+                # Servis bozukken eski (süresi geçmiş de olsa) veriyi göster
+                self.stats["stale_on_error"] += 1
+                return json.loads(old_entry[0])
+            if not isinstance(e, CircuitOpenError):
+                self._store(key, None, negative_ttl, 0, is_error=True)
+            return default
+        self._store(key, value, ttl, stale_ttl)
+        return value
+
+    def _refresh_in_background(self, key, fetch, ttl, stale_ttl, negative_ttl):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                value = fetch()
+            except UpstreamError:
+                # Eski değer stale süresi boyunca kullanılmaya devam eder
+                self.stats["errors"] += 1
+            else:
+                self._store(key, value, ttl, stale_ttl)
+                self.stats["refreshes"] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def snapshot(self):
+        """İzleme için sayaçlar (bu süreç)."""
+        with self._lock:
+            size = len(self._memory)
+        stats = dict(self.stats)
+        lookups = sum(stats.get(k, 0) for k in ("hits", "stale_hits", "negative_hits", "misses"))
+        stats["memory_entries"] = size
+        stats["hit_rate"] = (
+            (lookups - stats.get("misses", 0)) / lookups if lookups else 0.0
+        )
+        return stats
+
+
+api_cache = ApiCache(API_CACHE_PATH, max_entries=API_CACHE_MAX_ENTRIES)
+
+
+def _cache_key(source, query, language=None):
+    """Kaynak + dil + normalize edilmiş sorgu (küçük harf, tek boşluk)."""
+    normalized = " ".join(str(query).casefold().split())
+    return f"{source}:{language or ''}:{normalized}"
+
+
 def search_tmdb_movies(query, language="tr-TR"):
     """
-    TMDb'de film arar.
+    TMDb'de film arar (önbellekli).
     Sonuç: {external_id, title, year, overview, poster_url} listesi döner.
     """
     print("[TMDB] API KEY VAR MI? ->", bool(TMDB_API_KEY))  # DEBUG
@@ -20,6 +407,34 @@ def search_tmdb_movies(query, language="tr-TR"):
     if not TMDB_API_KEY:
         return []
 
+    return api_cache.get_or_fetch(
+        _cache_key("tmdb_search", query, language),
+        lambda: _fetch_tmdb_movies(query, language),
+        ttl=SEARCH_CACHE_TTL,
+        default=[],
+    )
+
+
+def map_tmdb_movie(m):
+    """
+    TMDb film kaydını (arama sonucu ya da günlük ID dökümü satırı)
+    {external_id, title, year, overview, poster_url} sözlüğüne çevirir.
+    """
+    title = m.get("title") or m.get("name") or m.get("original_title") or "İsimsiz"
+    release_date = m.get("release_date") or ""
+    year = release_date[:4] if release_date else None
+    poster_path = m.get("poster_path")
+
+    return {
+        "external_id": str(m.get("id")),
+        "title": title,
+        "year": year,
+        "overview": m.get("overview") or "",
+        "poster_url": f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else None,
+    }
+
+
+def _fetch_tmdb_movies(query, language):
     params = {
         "api_key": TMDB_API_KEY,
         "query": query,
@@ -27,39 +442,22 @@ def search_tmdb_movies(query, language="tr-TR"):
         "include_adult": False,
     }
 
-    try:
-        resp = requests.get(f"{TMDB_BASE_URL}/search/movie", params=params, timeout=5)
-        print("[TMDB] status:", resp.status_code)  # DEBUG
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        print("[TMDB] HATA:", e)  # DEBUG
-        return []
+    data = tmdb.get_json(f"{TMDB_BASE_URL}/search/movie", params)
 
-    data = resp.json()
     results = []
 
     for m in data.get("results", []):
-        title = m.get("title") or m.get("name") or "İsimsiz"
-        release_date = m.get("release_date") or ""
-        year = release_date[:4] if release_date else None
-        poster_path = m.get("poster_path")
-
-        results.append({
-            "external_id": str(m.get("id")),
-            "title": title,
-            "year": year,
-            "overview": m.get("overview") or "",
-            "poster_url": f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else None,
-        })
+        results.append(map_tmdb_movie(m))
 
     print("[TMDB] Dönen sonuç sayısı:", len(results))  # DEBUG
     return results
 
 
-def get_tmdb_movie_details(tmdb_id, language="tr-TR"):
+def get_tmdb_movie_details(tmdb_id, language="tr-TR", retry_errors=False):
     """
-    Tek bir film için detay + cast bilgilerini getirir.
-    Dönen dict:
+    Tek bir film için detay + cast bilgilerini getirir (önbellekli).
+    retry_errors=True ise önbellekteki hata kaydı atlanır (bkz. ApiCache.get_or_fetch).
+    Hata durumunda None, aksi halde dict:
       {
         "overview": str,
         "director": str,
@@ -71,21 +469,23 @@ def get_tmdb_movie_details(tmdb_id, language="tr-TR"):
     if not TMDB_API_KEY:
         return None
 
+    return api_cache.get_or_fetch(
+        _cache_key("tmdb_detail", tmdb_id, language),
+        lambda: _fetch_tmdb_movie_details(tmdb_id, language),
+        ttl=DETAIL_CACHE_TTL,
+        default=None,
+        retry_errors=retry_errors,
+    )
+
+
+def _fetch_tmdb_movie_details(tmdb_id, language):
     params = {
         "api_key": TMDB_API_KEY,
         "language": language,
         "append_to_response": "credits",  # cast/crew için
     }
 
-    try:
-        resp = requests.get(f"{TMDB_BASE_URL}/movie/{tmdb_id}", params=params, timeout=5)
-        print("[TMDB DETAIL] status:", resp.status_code)  # DEBUG
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        print("[TMDB DETAIL] HATA:", e)
-        return None
-
-    data = resp.json()
+    data = tmdb.get_json(f"{TMDB_BASE_URL}/movie/{tmdb_id}", params)
 
     # Yönetmen
     director = ""
@@ -125,7 +525,7 @@ OPENLIBRARY_COVER_URL = "https://covers.openlibrary.org/b/id/{cover_id}-M.jpg"
 
 def search_openlibrary_books(query):
     """
-    OpenLibrary'de kitap arar.
+    OpenLibrary'de kitap arar (önbellekli).
     Sonuç: {external_id, title, year, authors, poster_url} listesi döner.
     external_id olarak varsa edition_key, yoksa works key kullanılır.
     """
@@ -133,21 +533,53 @@ def search_openlibrary_books(query):
     if not query:
         return []
 
+    return api_cache.get_or_fetch(
+        _cache_key("openlibrary_search", query),
+        lambda: _fetch_openlibrary_books(query),
+        ttl=SEARCH_CACHE_TTL,
+        default=[],
+    )
+
+
+def map_openlibrary_doc(doc):
+    """
+    OpenLibrary arama dokümanını {external_id, title, year, authors, poster_url}
+    sözlüğüne çevirir; external_id çıkarılamazsa None.
+    """
+    title = doc.get("title") or "İsimsiz"
+    year = doc.get("first_publish_year")
+    authors = ", ".join(doc.get("author_name", [])) if doc.get("author_name") else ""
+    cover_id = doc.get("cover_i")
+
+    # --- external_id seçimi ---
+    external_id = None
+    edition_keys = doc.get("edition_key")
+    if edition_keys:
+        external_id = edition_keys[0]             # örn: "OL12345M"
+    else:
+        external_id = doc.get("key")             # örn: "/works/OL82563W"
+
+    if not external_id:
+        return None
+
+    poster_url = OPENLIBRARY_COVER_URL.format(cover_id=cover_id) if cover_id else None
+
+    return {
+        "external_id": external_id,
+        "title": title,
+        "year": year,
+        "authors": authors,
+        "poster_url": poster_url,
+    }
+
+
+def _fetch_openlibrary_books(query):
     params = {
         "title": query,
         "limit": 20,
     }
 
-    try:
-        resp = requests.get(OPENLIBRARY_SEARCH_URL, params=params, timeout=5)
-        print("[OL] url:", resp.url)
-        print("[OL] status:", resp.status_code)
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        print("[OL] HATA:", e)
-        return []
-
-    data = resp.json()
+    data = openlibrary.get_json(OPENLIBRARY_SEARCH_URL, params)
     print("[OL] raw num_found:", data.get("num_found"))
 
     docs = data.get("docs", [])
@@ -156,31 +588,19 @@ def search_openlibrary_books(query):
     results = []
 
     for doc in docs:
-        title = doc.get("title") or "İsimsiz"
-        year = doc.get("first_publish_year")
-        authors = ", ".join(doc.get("author_name", [])) if doc.get("author_name") else ""
-        cover_id = doc.get("cover_i")
-
-        # --- external_id seçimi ---
-        external_id = None
-        edition_keys = doc.get("edition_key")
-        if edition_keys:
-            external_id = edition_keys[0]             # örn: "OL12345M"
-        else:
-            external_id = doc.get("key")             # örn: "/works/OL82563W"
-
-        if not external_id:
-            continue
-
-        poster_url = OPENLIBRARY_COVER_URL.format(cover_id=cover_id) if cover_id else None
-
-        results.append({
-            "external_id": external_id,
-            "title": title,
-            "year": year,
-            "authors": authors,
-            "poster_url": poster_url,
-        })
+        book = map_openlibrary_doc(doc)
+        if book:
+            results.append(book)
 
     print("[OL] Dönen sonuç sayısı:", len(results))
     return results
+
+
+def upstream_status():
+    """İzleme için servis devre durumları + önbellek sayaçları (bu süreç)."""
+    with _image_upstreams_lock:
+        image_hosts = list(_image_upstreams.values())
+    return {
+        "upstreams": {u.name: u.breaker.snapshot() for u in (tmdb, openlibrary, *image_hosts)},
+        "cache": api_cache.snapshot(),
+    }
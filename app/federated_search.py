@@ -0,0 +1,125 @@
+"""
+Birleşik arama: yerel katalog + TMDb + OpenLibrary.
+
+Dış servisler sınırlı bir thread havuzunda aynı anda sorgulanır; yerel
+arama bu sırada istek thread'inde çalışır. Her kaynağın kendi süre sınırı
+vardır, geç kalan kaynak atlanır ve sonuç kısmi döner. Sayfanın süresi
+kaynakların toplamı değil en yavaşıdır (en fazla süre sınırı kadar).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import current_app
+from sqlalchemy import tuple_
+
+from .models import Content
+from .external_api import search_tmdb_movies, search_openlibrary_books
+from .search_index import search_contents
+
+LOCAL_LIMIT = 50
+
+# kaynak adı -> içe aktarılırken kullanılan Content.source
+UPSTREAM_SOURCES = {
+    "tmdb": "tmdb",
+    "openlibrary": "openlibrary",
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get("FEDERATED_SEARCH_WORKERS", 8),
+                thread_name_prefix="federated-search",
+            )
+        return _executor
+
+
+def _search_upstream(name, q):
+    if name == "tmdb":
+        return search_tmdb_movies(q)
+    return search_openlibrary_books(q)
+
+
+def search_local(q, limit=LOCAL_LIMIT):
+    """Yerel katalogda FTS5 indeksiyle arama (BM25 sıralı)."""
+    return search_contents(q, limit=limit)
+
+
+def _attach_local_ids(upstream_results, local_ids):
+    """
+    Dış sonuçları daha önce içe aktarılmış içeriklerle eşleştir:
+    yerel sonuçlarda zaten görünenler çıkarılır, diğerlerine content_id eklenir.
+    """
+    keys = {
+        (UPSTREAM_SOURCES[name], str(item["external_id"]))
+        for name, items in upstream_results.items()
+        for item in items
+    }
+    imported = {}
+    if keys:
+        rows = (
+            Content.query
+            .with_entities(Content.source, Content.external_id, Content.id)
+            .filter(tuple_(Content.source, Content.external_id).in_(list(keys)))
+            .all()
+        )
+        imported = {(source, external_id): cid for source, external_id, cid in rows}
+
+    merged = {}
+    for name, items in upstream_results.items():
+        merged[name] = []
+        for item in items:
+            content_id = imported.get((UPSTREAM_SOURCES[name], str(item["external_id"])))
+            if content_id in local_ids:
+                continue
+            merged[name].append(dict(item, content_id=content_id))
+    return merged
+
+
+def federated_search(q):
+    """
+    Dönen dict:
+      local:     [Content, ...]
+      tmdb:      [{external_id, title, ..., content_id}, ...]
+      openlibrary: [...]
+      timed_out: süre sınırına yetişemeyen kaynaklar
+      failed:    hata veren kaynaklar
+    """
+    config = current_app.config
+    sources = config.get("FEDERATED_SEARCH_SOURCES", ("local", "tmdb", "openlibrary"))
+    timeouts = config.get("SEARCH_SOURCE_TIMEOUTS", {})
+    default_timeout = config.get("SEARCH_SOURCE_TIMEOUT", 2.5)
+
+    started = time.monotonic()
+    futures = {
+        name: _get_executor().submit(_search_upstream, name, q)
+        for name in UPSTREAM_SOURCES
+        if name in sources
+    }
+
+    local = search_local(q) if "local" in sources else []
+
+    upstream_results = {name: [] for name in UPSTREAM_SOURCES}
+    timed_out, failed = [], []
+    for name, future in futures.items():
+        deadline = started + timeouts.get(name, default_timeout)
+        try:
+            upstream_results[name] = future.result(
+                timeout=max(0.0, deadline - time.monotonic())
+            )
+        except FutureTimeout:
+            # İstek arka planda tamamlanınca önbelleğe düşer; sonraki aramada gelir
+            timed_out.append(name)
+        except Exception as e:
+            print(f"[SEARCH] {name} HATA:", e)
+            failed.append(name)
+
+    result = _attach_local_ids(upstream_results, {c.id for c in local})
+    result.update(local=local, timed_out=timed_out, failed=failed)
+    return result
@@ -1,10 +1,16 @@
-from flask import Blueprint, render_template, request, jsonify
+import re
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, jsonify, url_for, abort, current_app
+from markupsafe import Markup
 from flask_login import login_required, current_user
-from sqlalchemy import func
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import joinedload, contains_eager
 from ..models import (
     db,
     Activity,
     Content,
+    ContentStats,
     User,
     Follow,
     Rating,
@@ -14,6 +20,16 @@ from ..models import (
     ActivityComment,
 )
 from ..external_api import search_tmdb_movies, search_openlibrary_books
+from ..timeline import timeline_query
+from ..pagination import encode_cursor, decode_cursor, decode_time_cursor, keyset_page
+from ..counters import bump_like_count, bump_comment_count
+from ..leaderboard import get_popular_users, search_users
+from ..federated_search import federated_search
+from ..autocomplete import suggest_contents, suggest_users
+from ..follow_graph import following_ids
+from ..identity import user_by_id
+from ..fragment_cache import fragment_cache
+from ..conditional import page_etag, not_modified, with_etag
 
 bp = Blueprint("feed", __name__, template_folder="../templates/feed")
 
@@ -21,212 +37,316 @@ PER_PAGE = 16
 
 
 def _get_followed_ids(user):
-    """Kullanıcının kendisi + takip ettikleri."""
-    ids = [user.id]
-    # user.following ilişkini Follow modeli ile kurmuştuk
-    for f in user.following.all():
-        ids.append(f.followed_id)
-    return ids
+    """Kullanıcının kendisi + takip ettikleri (takip grafiği önbelleğinden)."""
+    return [user.id, *following_ids(user.id)]
+
+
+def _feed_page(user, cursor=None):
+    """
+    Akışın bir sayfası: timeline_entries üzerinden (created_at, id) keyset ile okunur.
+    Kartta kullanılan kullanıcı ve içerik aynı sorguda gelir.
+    Dönen: (activities, next_cursor) — son sayfada next_cursor None.
+    """
+    followed_ids = _get_followed_ids(user)
+    query = timeline_query(user, followed_ids, before=decode_time_cursor(cursor)).options(
+        joinedload(Activity.user), joinedload(Activity.content)
+    )
+    activities, has_next = keyset_page(query, PER_PAGE)
+
+    next_cursor = None
+    if has_next:
+        last = activities[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return activities, next_cursor
 
 
 def _build_activity_cards(activities):
-    """Her Activity için rating / review / list_item + like/comment verilerini hazırla."""
-    cards = []
+    """
+    Her Activity için rating / review / list_item + yorum verilerini hazırla.
+    Sayfadaki tüm aktiviteler toplu yüklenir; kart sayısından bağımsız
+    olarak sabit sayıda sorgu çalışır. Beğeni sayısı Activity.like_count'tan gelir.
+    """
+    if not activities:
+        return []
+
+    # activity_type'a göre ref_id'leri grupla, her tür için tek sorgu
+    ref_ids = {"rating": set(), "review": set(), "list_add": set()}
     for act in activities:
-        rating = review = list_item = None
-
-        if act.activity_type == "rating" and act.ref_id:
-            rating = Rating.query.get(act.ref_id)
-        elif act.activity_type == "review" and act.ref_id:
-            review = Review.query.get(act.ref_id)
-        elif act.activity_type == "list_add" and act.ref_id:
-            list_item = ListItem.query.get(act.ref_id)
-
-        likes_count = ActivityLike.query.filter_by(activity_id=act.id).count()
-        comments = (
-            ActivityComment.query
-            .filter_by(activity_id=act.id)
-            .order_by(ActivityComment.created_at.asc())
-            .all()
-        )
+        if act.ref_id and act.activity_type in ref_ids:
+            ref_ids[act.activity_type].add(act.ref_id)
+
+    ratings = {}
+    if ref_ids["rating"]:
+        ratings = {
+            r.id: r for r in Rating.query.filter(Rating.id.in_(ref_ids["rating"]))
+        }
+
+    reviews = {}
+    if ref_ids["review"]:
+        reviews = {
+            r.id: r for r in Review.query.filter(Review.id.in_(ref_ids["review"]))
+        }
 
+    list_items = {}
+    if ref_ids["list_add"]:
+        list_items = {
+            li.id: li
+            for li in ListItem.query
+            .options(joinedload(ListItem.user_list))
+            .filter(ListItem.id.in_(ref_ids["list_add"]))
+        }
+
+    activity_ids = [act.id for act in activities]
+
+    # Yorumlar (yazarlarıyla birlikte), aktiviteye göre dağıt
+    comments_by_activity = {act_id: [] for act_id in activity_ids}
+    comments = (
+        ActivityComment.query
+        .options(joinedload(ActivityComment.user))
+        .filter(ActivityComment.activity_id.in_(activity_ids))
+        .order_by(ActivityComment.created_at.asc())
+        .all()
+    )
+    for c in comments:
+        comments_by_activity[c.activity_id].append(c)
+
+    cards = []
+    for act in activities:
         cards.append(
             {
                 "activity": act,
-                "rating": rating,
-                "review": review,
-                "list_item": list_item,
-                "likes_count": likes_count,
-                "comments": comments,
+                "rating": ratings.get(act.ref_id) if act.activity_type == "rating" else None,
+                "review": reviews.get(act.ref_id) if act.activity_type == "review" else None,
+                "list_item": list_items.get(act.ref_id) if act.activity_type == "list_add" else None,
+                "likes_count": act.like_count,
+                "comments": comments_by_activity[act.id],
             }
         )
     return cards
 
 
+# Önbellekteki kart HTML'inde izleyiciye / zamana göre değişen kısımlar
+_MARKER_RE = re.compile(r"<!--(ts|liked):([^>]*?)-->")
 
 
+@bp.app_template_filter("ts_marker")
+def ts_marker(value):
+    """"x önce" metni yerine işaretçi; gönderilmeden önce _fill_markers doldurur."""
+    if not value:
+        return ""
+    return Markup(f"<!--ts:{value.isoformat()}-->")
 
-# ------------------ AKIŞ (FEED) ------------------
 
-def _build_discovery_base_query(content_type: str):
-    """
-    Film/kitap için ortak sorgu.
-    Dönen:
-      base_q, rating_subq, list_subq, review_subq
-    """
+@bp.app_template_filter("liked_marker")
+def liked_marker(activity_id):
+    return Markup(f"<!--liked:{activity_id}-->")
 
-    # Ortalama puanlar
-    rating_subq = (
-        db.session.query(
-            Rating.content_id.label("content_id"),
-            func.avg(Rating.score).label("avg_score"),
-            func.count(Rating.id).label("rating_count"),
-        )
-        .group_by(Rating.content_id)
-        .subquery()
-    )
 
-    # Kaç kişinin listesinde?
-    list_subq = (
-        db.session.query(
-            ListItem.content_id.label("content_id"),
-            func.count(ListItem.id).label("list_count"),
-        )
-        .group_by(ListItem.content_id)
-        .subquery()
+def _fill_markers(html, liked_ids=frozenset()):
+    timesince = current_app.jinja_env.filters["timesince"]
+
+    def fill(match):
+        kind, value = match.groups()
+        if kind == "ts":
+            return timesince(datetime.fromisoformat(value))
+        return "btn-primary" if int(value) in liked_ids else "btn-outline-secondary"
+
+    return Markup(_MARKER_RE.sub(fill, html))
+
+
+def _card_cache_key(act):
+    # Beğeni / yorum / puan düzenlemesi Activity.version'ı artırır (bkz. counters.py);
+    # kart başlığındaki kullanıcı ve içerik alanları anahtarda
+    content = act.content
+    return (
+        "activity-card", act.id, act.version,
+        act.user.username, act.user.avatar_url,
+        (content.title, content.type, content.poster_url) if content else None,
     )
 
-    # Kaç yorum almış?
-    review_subq = (
-        db.session.query(
-            Review.content_id.label("content_id"),
-            func.count(Review.id).label("review_count"),
+
+def _render_activity_cards(activities, viewer):
+    """
+    Kartları parça önbelleğinden birleştir; yalnızca önbellekte olmayanlar için
+    rating / review / yorum verisi yüklenip render edilir. Beğeni durumu ve
+    "x önce" metinleri izleyici için sonradan doldurulur.
+    """
+    if not activities:
+        return Markup("")
+
+    keys = {act.id: _card_cache_key(act) for act in activities}
+    html_by_id = {act.id: fragment_cache.get(keys[act.id]) for act in activities}
+
+    misses = [act for act in activities if html_by_id[act.id] is None]
+    for card in _build_activity_cards(misses):
+        act_id = card["activity"].id
+        html = render_template("feed/_activity_card.html", card=card)
+        fragment_cache.set(keys[act_id], html)
+        html_by_id[act_id] = html
+
+    liked_ids = {
+        activity_id
+        for (activity_id,) in ActivityLike.query
+        .with_entities(ActivityLike.activity_id)
+        .filter(
+            ActivityLike.user_id == viewer.id,
+            ActivityLike.activity_id.in_(list(html_by_id)),
         )
-        .group_by(Review.content_id)
-        .subquery()
-    )
+    }
+    return _fill_markers("".join(html_by_id[act.id] for act in activities), liked_ids)
+
+
+
+
 
-    base_q = (
+# ------------------ AKIŞ (FEED) ------------------
+
+def _discovery_query(content_type: str):
+    """
+    Film/kitap keşfet listeleri için ortak sorgu (content_stats üzerinden).
+    Satırlar: (Content, avg_score, rating_count, list_count, review_count)
+    """
+    return (
         db.session.query(
             Content,
-            func.coalesce(rating_subq.c.avg_score, 0).label("avg_score"),
-            func.coalesce(rating_subq.c.rating_count, 0).label("rating_count"),
-            func.coalesce(list_subq.c.list_count, 0).label("list_count"),
-            func.coalesce(review_subq.c.review_count, 0).label("review_count"),
+            ContentStats.avg_score,
+            ContentStats.rating_count,
+            ContentStats.list_count,
+            ContentStats.review_count,
         )
-        .outerjoin(rating_subq, rating_subq.c.content_id == Content.id)
-        .outerjoin(list_subq, list_subq.c.content_id == Content.id)
-        .outerjoin(review_subq, review_subq.c.content_id == Content.id)
-        .filter(Content.type == content_type)
+        .join(ContentStats, ContentStats.content_id == Content.id)
+        .options(contains_eager(Content.stats))
+        .filter(ContentStats.type == content_type)
     )
 
-    return base_q, rating_subq, list_subq, review_subq
+
+# Sıralama anahtarları: (type, <kolon>) indeksiyle sıralı okunur
+RANKINGS = {
+    "top-rated": ContentStats.avg_score,
+    "popular": ContentStats.popularity,
+}
+TOP_RATED_ORDER = (ContentStats.avg_score.desc(), ContentStats.content_id.desc())
+POPULAR_ORDER = (ContentStats.popularity.desc(), ContentStats.content_id.desc())
+
+CATALOG_PER_PAGE = 24
 
 
 def get_discovery_lists(content_type: str, limit: int = 15):
     """
     Anasayfadaki vitrinler için sınırlı liste
     """
-    base_q, rating_subq, list_subq, review_subq = _build_discovery_base_query(
-        content_type
-    )
+    base_q = _discovery_query(content_type)
 
     # En yüksek puanlılar
-    top_rated = (
-        base_q.order_by(func.coalesce(rating_subq.c.avg_score, 0).desc())
-        .limit(limit)
-        .all()
-    )
+    top_rated = base_q.order_by(*TOP_RATED_ORDER).limit(limit).all()
 
     # En popüler (liste + yorum sayısı)
-    popularity_score = (
-        func.coalesce(list_subq.c.list_count, 0)
-        + func.coalesce(review_subq.c.review_count, 0)
-    )
-    most_popular = (
-        base_q.order_by(popularity_score.desc()).limit(limit).all()
-    )
+    most_popular = base_q.order_by(*POPULAR_ORDER).limit(limit).all()
 
     return top_rated, most_popular
 
 
+def _catalog_page(content_type: str, ranking: str, cursor=None):
+    """
+    "Tümünü gör" sayfalarının bir sayfası; (sıralama değeri, content_id) keyset'i.
+    Dönen: (items, next_cursor) — son sayfada next_cursor None.
+    """
+    rank_col = RANKINGS[ranking]
+    q = _discovery_query(content_type).order_by(
+        rank_col.desc(), ContentStats.content_id.desc()
+    )
 
+    after = decode_cursor(cursor)
+    if after and len(after) == 2:
+        q = q.filter(tuple_(rank_col, ContentStats.content_id) < tuple(after))
 
-from flask_login import login_required
-from flask import render_template
+    items, has_next = keyset_page(q, CATALOG_PER_PAGE)
 
+    next_cursor = None
+    if has_next:
+        content = items[-1][0]
+        next_cursor = encode_cursor(getattr(content.stats, rank_col.key), content.id)
+    return items, next_cursor
 
-@bp.route("/movies/top-rated")
-@login_required
-def movies_top_rated():
-    base_q, rating_subq, list_subq, review_subq = _build_discovery_base_query(
-        "movie"
-    )
-    items = (
-        base_q.order_by(func.coalesce(rating_subq.c.avg_score, 0).desc())
-        .all()
+
+def _discovery_stamp(content_type: str):
+    """Keşfet listelerinin sürümü: o türdeki en son istatistik güncellemesi (indeksli MAX)."""
+    return (
+        db.session.query(func.max(ContentStats.updated_at))
+        .filter(ContentStats.type == content_type)
+        .scalar()
     )
 
-    return render_template(
-        "search/movies_list.html",
-        page_title="En Yüksek Puanlı Filmler",
-        items=items,
+
+def _render_catalog(content_type: str, ranking: str, page_title: str):
+    etag = page_etag(_discovery_stamp(content_type))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    items, next_cursor = _catalog_page(content_type, ranking)
+    template = "search/movies_list.html" if content_type == "movie" else "search/books_list.html"
+    return with_etag(
+        render_template(
+            template,
+            page_title=page_title,
+            items=items,
+            next_cursor=next_cursor,
+            more_url=url_for("feed.catalog_more", content_type=content_type, ranking=ranking),
+        ),
+        etag,
     )
 
 
+@bp.route("/movies/top-rated")
+@login_required
+def movies_top_rated():
+    return _render_catalog("movie", "top-rated", "En Yüksek Puanlı Filmler")
+
+
 @bp.route("/movies/popular")
 @login_required
 def movies_popular():
-    base_q, rating_subq, list_subq, review_subq = _build_discovery_base_query(
-        "movie"
-    )
-    popularity_score = (
-        func.coalesce(list_subq.c.list_count, 0)
-        + func.coalesce(review_subq.c.review_count, 0)
-    )
-    items = base_q.order_by(popularity_score.desc()).all()
-
-    return render_template(
-        "search/movies_list.html",
-        page_title="En Popüler Filmler",
-        items=items,
-    )
+    return _render_catalog("movie", "popular", "En Popüler Filmler")
 
 
 @bp.route("/books/top-rated")
 @login_required
 def books_top_rated():
-    base_q, rating_subq, list_subq, review_subq = _build_discovery_base_query(
-        "book"
-    )
-    items = (
-        base_q.order_by(func.coalesce(rating_subq.c.avg_score, 0).desc())
-        .all()
-    )
-
-    return render_template(
-        "search/books_list.html",
-        page_title="En Yüksek Puanlı Kitaplar",
-        items=items,
-    )
+    return _render_catalog("book", "top-rated", "En Yüksek Puanlı Kitaplar")
 
 
 @bp.route("/books/popular")
 @login_required
 def books_popular():
-    base_q, rating_subq, list_subq, review_subq = _build_discovery_base_query(
-        "book"
-    )
-    popularity_score = (
-        func.coalesce(list_subq.c.list_count, 0)
-        + func.coalesce(review_subq.c.review_count, 0)
-    )
-    items = base_q.order_by(popularity_score.desc()).all()
+    return _render_catalog("book", "popular", "En Popüler Kitaplar")
 
-    return render_template(
-        "search/books_list.html",
-        page_title="En Popüler Kitaplar",
-        items=items,
+
+@bp.route("/catalog/<string:content_type>/<string:ranking>/more")
+@login_required
+def catalog_more(content_type, ranking):
+    """Katalog listelerinde sonsuz kaydırma için JSON dönen endpoint."""
+    if content_type not in ("movie", "book") or ranking not in RANKINGS:
+        abort(404)
+
+    etag = page_etag(_discovery_stamp(content_type))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    cursor = request.args.get("cursor", "", type=str)
+    items, next_cursor = _catalog_page(content_type, ranking, cursor)
+    html = render_template("search/_catalog_cards.html", items=items)
+
+    return with_etag(
+        jsonify(
+            {
+                "html": html,
+                "has_next": next_cursor is not None,
+                "next_cursor": next_cursor,
+            }
+        ),
+        etag,
     )
 
 
@@ -236,36 +356,25 @@ def books_popular():
 @bp.route("/")
 @login_required
 def index():
-    page = request.args.get("page", 1, type=int)
+    cursor = request.args.get("cursor", "", type=str)
     user_q = request.args.get("user_q", "", type=str).strip()
 
-    followed_ids = _get_followed_ids(current_user)
-
-    base_query = (
-        Activity.query.filter(Activity.user_id.in_(followed_ids))
-        .order_by(Activity.created_at.desc())
-    )
+    activities, next_cursor = _feed_page(current_user, cursor)
+    cards_html = _render_activity_cards(activities, current_user)
 
-    pagination = base_query.paginate(page=page, per_page=PER_PAGE, error_out=False)
-    activities = pagination.items
-    activity_cards = _build_activity_cards(activities)
-
-    # Popüler kullanıcılar + kullanıcı arama
-    user_query = User.query
+    # Popüler kullanıcılar (önbellekten) + kullanıcı arama (önek, indeksli)
     if user_q:
-        user_query = user_query.filter(User.username.ilike(f"%{user_q}%"))
-
-    all_users = user_query.all()
-    popular_sorted = sorted(all_users, key=lambda u: u.followers.count(), reverse=True)
-    popular_users = [(u, u.followers.count()) for u in popular_sorted[:10]]
+        popular = search_users(user_q, limit=10)
+    else:
+        popular = get_popular_users(limit=10)
+    popular_users = [(u, u.follower_count) for u in popular]
 
     return render_template(
         "feed/index.html",
-        activity_cards=activity_cards,
+        cards_html=cards_html,
         popular_users=popular_users,
         user_q=user_q,
-        has_next=pagination.has_next,
-        next_page=page + 1,
+        next_cursor=next_cursor,
     )
 
 
@@ -273,27 +382,27 @@ def index():
 @login_required
 def more():
     """Daha Fazla Yükle butonu için JSON dönen endpoint."""
-    page = request.args.get("page", 2, type=int)
-
-    followed_ids = _get_followed_ids(current_user)
+    cursor = request.args.get("cursor", "", type=str)
 
-    base_query = (
-        Activity.query.filter(Activity.user_id.in_(followed_ids))
-        .order_by(Activity.created_at.desc())
-    )
+    activities, next_cursor = _feed_page(current_user, cursor)
 
-    pagination = base_query.paginate(page=page, per_page=PER_PAGE, error_out=False)
-    activities = pagination.items
-    activity_cards = _build_activity_cards(activities)
+    # Kart sürümleri beğeni / yorumla (izleyicinin beğenisi dahil) değişir
+    etag = page_etag(next_cursor, [_card_cache_key(act) for act in activities])
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
 
-    html = render_template("feed/_activity_cards.html", activity_cards=activity_cards)
+    html = _render_activity_cards(activities, current_user)
 
-    return jsonify(
-        {
-            "html": html,
-            "has_next": pagination.has_next,
-            "next_page": page + 1,
-        }
+    return with_etag(
+        jsonify(
+            {
+                "html": html,
+                "has_next": next_cursor is not None,
+                "next_cursor": next_cursor,
+            }
+        ),
+        etag,
     )
 
 
@@ -310,13 +419,14 @@ def like_activity(activity_id):
     if like:
         db.session.delete(like)
         liked = False
+        like_count = bump_like_count(activity_id, -1)
     else:
         like = ActivityLike(activity_id=activity_id, user_id=current_user.id)
         db.session.add(like)
         liked = True
+        like_count = bump_like_count(activity_id, 1)
 
     db.session.commit()
-    like_count = ActivityLike.query.filter_by(activity_id=activity_id).count()
 
     return jsonify({"liked": liked, "like_count": like_count})
 
@@ -336,6 +446,7 @@ def comment_activity(activity_id):
         text=text,
     )
     db.session.add(comment)
+    comment_count = bump_comment_count(activity_id, 1)
     db.session.commit()
 
     comments = (
@@ -344,14 +455,17 @@ def comment_activity(activity_id):
         .order_by(ActivityComment.created_at.asc())
         .all()
     )
+    # Yorum sahipleri kimlik önbelleğinden; c.user ilişkisi oturumdaki nesneyi kullanır
+    for user_id in {c.user_id for c in comments}:
+        user_by_id(user_id)
 
-    html = render_template("feed/_activity_comments.html", comments=comments, activity=act)
+    html = _fill_markers(render_template("feed/_activity_comments.html", comments=comments, activity=act))
 
     return jsonify(
         {
             "ok": True,
             "html": html,
-            "comment_count": len(comments),
+            "comment_count": comment_count,
         }
     )
 
@@ -362,32 +476,80 @@ def comment_activity(activity_id):
 @bp.route("/search")
 @login_required
 def search():
+    """Birleşik arama: yerel katalog + TMDb + OpenLibrary aynı anda."""
     q = request.args.get("q", "").strip()
-    results = []
+    results = None
 
     if q:
-        # Başlığa göre basit LIKE araması (case-insensitive)
-        results = Content.query.filter(Content.title.ilike(f"%{q}%")).all()
+        results = federated_search(q)
 
     return render_template("search/search.html", q=q, results=results)
 
 
+@bp.route("/autocomplete")
+@login_required
+def autocomplete():
+    """
+    Yazarken arama önerileri (JSON).
+    ?q=...&kind=content|user[&type=movie|book]
+    """
+    q = request.args.get("q", "").strip()
+    kind = request.args.get("kind", "content")
+    limit = min(request.args.get("limit", 8, type=int), 20)
+
+    if kind == "user":
+        suggestions = [
+            {
+                "id": uid,
+                "label": username,
+                "value": username,
+                "url": url_for("profile.view_profile", username=username),
+            }
+            for uid, username in suggest_users(q, limit=limit)
+        ]
+    else:
+        content_type = request.args.get("type")
+        if content_type not in ("movie", "book"):
+            content_type = None
+        suggestions = [
+            {
+                "id": cid,
+                "label": title,
+                "value": title,
+                "url": url_for("content.detail", content_id=cid),
+            }
+            for cid, title, _ in suggest_contents(q, content_type=content_type, limit=limit)
+        ]
+
+    return jsonify({"q": q, "results": suggestions})
+
+
 @bp.route("/search/movies")
 @login_required
 def search_movies():
     q = request.args.get("q", "").strip()
+
+    # Dış arama sonuçları sürümlenemez; yalnızca aramasız vitrin sayfası koşullu
+    etag = None if q else page_etag(_discovery_stamp("movie"))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     results = []
     if q:
         results = search_tmdb_movies(q)  # TMDb’den film arama (senin mevcut fonksiyonun)
 
     top_rated, most_popular = get_discovery_lists("movie")
 
-    return render_template(
-        "search/movies.html",
-        query=q,
-        results=results,
-        top_rated=top_rated,
-        most_popular=most_popular,
+    return with_etag(
+        render_template(
+            "search/movies.html",
+            query=q,
+            results=results,
+            top_rated=top_rated,
+            most_popular=most_popular,
+        ),
+        etag,
     )
 
 
@@ -396,16 +558,26 @@ def search_movies():
 @login_required
 def search_books():
     q = request.args.get("q", "").strip()
+
+    # Dış arama sonuçları sürümlenemez; yalnızca aramasız vitrin sayfası koşullu
+    etag = None if q else page_etag(_discovery_stamp("book"))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     results = []
     if q:
         results = search_openlibrary_books(q)
 
     top_rated, most_popular = get_discovery_lists("book")
 
-    return render_template(
-        "search/books.html",
-        query=q,
-        results=results,
-        top_rated=top_rated,
-        most_popular=most_popular,
+    return with_etag(
+        render_template(
+            "search/books.html",
+            query=q,
+            results=results,
+            top_rated=top_rated,
+            most_popular=most_popular,
+        ),
+        etag,
     )
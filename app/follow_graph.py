@@ -0,0 +1,151 @@
+"""
+Süreç içi takip grafiği önbelleği.
+
+Her kullanıcı için takip ettiklerinin ve takipçilerinin id'leri sıralı,
+sıkışık tamsayı dizilerinde (array('q')) tutulur; "takip ediyor mu?"
+sorusu bisect ile, akış için takip edilenler listesi doğrudan bellekten
+cevaplanır. Toplam tutulan id sayısı FOLLOW_GRAPH_MAX_IDS'i aşınca en
+eski kullanılan kayıtlar atılır (LRU).
+
+Geçersizleme: follow / unfollow her iki kullanıcı için follow_graph_log
+tablosuna birer satır yazar. Her süreç bu tabloyu en fazla
+FOLLOW_GRAPH_SYNC_INTERVAL saniyede bir (id > son görülen) okur ve
+değişen kullanıcıların kayıtlarını atar. Yazmayı yapan süreç kendi
+önbelleğini hemen temizler. Atılan kullanıcılar kimlik önbelleğinden
+de atılır (bkz. identity.py).
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, func, delete
+
+from .models import db, Follow, FollowGraphLog
+from .identity import forget_user, forget_all
+
+# Günlük satırları bu süreden sonra silinir; bu kadar süre eşitleme yapmamış
+# bir süreç önbelleğinin tamamını atar.
+LOG_RETENTION = timedelta(hours=1)
+PRUNE_EVERY = 256  # her N günlük satırında bir eski satırları sil
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # (user_id, "following" | "followers") -> array('q')
+_state = {"size": 0, "last_log_id": None, "synced_at": 0.0}
+
+
+def _load(user_id, direction):
+    if direction == "following":
+        column, key = Follow.followed_id, Follow.follower_id
+    else:
+        column, key = Follow.follower_id, Follow.followed_id
+    ids = db.session.execute(select(column).where(key == user_id).order_by(column)).scalars()
+    return array("q", ids)
+
+
+def _evict_user(user_id):
+    # Takip sayaçları User satırında: kimlik önbelleğindeki kopya da eskidi
+    forget_user(user_id)
+    for direction in ("following", "followers"):
+        ids = _entries.pop((user_id, direction), None)
+        if ids is not None:
+            _state["size"] -= len(ids) + 1
+
+
+def _clear():
+    forget_all()
+    _entries.clear()
+    _state["size"] = 0
+
+
+def _sync():
+    """Diğer süreçlerin yaptığı takip değişikliklerini günlükten oku (en fazla saniyede bir)."""
+    now = time.monotonic()
+    interval = current_app.config.get("FOLLOW_GRAPH_SYNC_INTERVAL", 1.0)
+    if now - _state["synced_at"] < interval:
+        return
+
+    last_id = _state["last_log_id"]
+    if last_id is None or now - _state["synced_at"] > LOG_RETENTION.total_seconds() / 2:
+        # İlk eşitleme ya da uzun süre eşitleme yapılmadı: günlükte boşluk olabilir
+        _clear()
+        _state["last_log_id"] = db.session.execute(select(func.max(FollowGraphLog.id))).scalar() or 0
+    else:
+        rows = db.session.execute(
+            select(FollowGraphLog.id, FollowGraphLog.user_id)
+            .where(FollowGraphLog.id > last_id)
+            .order_by(FollowGraphLog.id)
+        ).all()
+        for log_id, user_id in rows:
+            _evict_user(user_id)
+            _state["last_log_id"] = log_id
+    _state["synced_at"] = now
+
+
+def sync():
+    with _lock:
+        _sync()
+
+
+def _get(user_id, direction):
+    with _lock:
+        _sync()
+        key = (user_id, direction)
+        ids = _entries.get(key)
+        if ids is not None:
+            _entries.move_to_end(key)
+            return ids
+
+        ids = _load(user_id, direction)
+        _entries[key] = ids
+        _state["size"] += len(ids) + 1  # boş listeler de yer kaplar
+        max_ids = current_app.config.get("FOLLOW_GRAPH_MAX_IDS", 2_000_000)
+        while _state["size"] > max_ids and len(_entries) > 1:
+            _, evicted = _entries.popitem(last=False)
+            _state["size"] -= len(evicted) + 1
+        return ids
+
+
+def following_ids(user_id):
+    """Kullanıcının takip ettiklerinin id'leri (sıralı, salt okunur dizi)."""
+    return _get(user_id, "following")
+
+
+def follower_ids(user_id):
+    """Kullanıcının takipçilerinin id'leri (sıralı, salt okunur dizi)."""
+    return _get(user_id, "followers")
+
+
+def is_following(follower_id, followed_id):
+    ids = following_ids(follower_id)
+    i = bisect_left(ids, followed_id)
+    return i < len(ids) and ids[i] == followed_id
+
+
+def record_follow_change(follower_id, followed_id):
+    """
+    follow / unfollow sonrası çağrılır (aynı transaction içinde): diğer
+    süreçler için günlüğe yaz, bu süreçteki kayıtları hemen at.
+    """
+    now = datetime.utcnow()
+    db.session.add_all([
+        FollowGraphLog(user_id=follower_id, created_at=now),
+        FollowGraphLog(user_id=followed_id, created_at=now),
+    ])
+    db.session.flush()
+
+    last = db.session.execute(select(func.max(FollowGraphLog.id))).scalar()
+    if last and last % PRUNE_EVERY < 2:
+        db.session.execute(delete(FollowGraphLog).where(FollowGraphLog.created_at < now - LOG_RETENTION))
+
+    with _lock:
+        _evict_user(follower_id)
+        _evict_user(followed_id)
+
+
+def snapshot():
+    with _lock:
+        return {"entries": len(_entries), "ids": _state["size"], "last_log_id": _state["last_log_id"]}
@@ -0,0 +1,79 @@
+"""
+Render edilmiş HTML parçaları için süreç içi önbellek.
+
+Bayt sınırlı bir LRU'dur: toplam boyut max_bytes'ı aşınca en eski
+kullanılan parçalar atılır. Anahtarlar içeriğin sürümünü içerir
+(ör. puan / yorum sayaçları, meta özeti); veri değişince anahtar da
+değiştiği için ayrıca silme gerekmez, eski parça LRU ile düşer.
+"""
+import threading
+from collections import OrderedDict
+
+from markupsafe import Markup
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+class FragmentCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (html, boyut)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.kind_stats = {}  # anahtarın ilk elemanı (parça türü) -> {"hits", "misses"}
+
+    def _count(self, key, outcome):
+        self.stats[outcome] += 1
+        kind = key[0] if isinstance(key, tuple) else "other"
+        counts = self.kind_stats.setdefault(kind, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count(key, "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(key, "hits")
+            return entry[0]
+
+    def set(self, key, html):
+        size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (html, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def get_or_render(self, key, render):
+        """Önbellekte varsa döndür, yoksa render() ile üretip sakla."""
+        html = self.get(key)
+        if html is None:
+            html = str(render())
+            self.set(key, html)
+        return Markup(html)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self):
+        with self._lock:
+            kinds = {
+                kind: dict(counts, hit_rate=round(counts["hits"] / ((counts["hits"] + counts["misses"]) or 1), 3))
+                for kind, counts in self.kind_stats.items()
+            }
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes, kinds=kinds)
+
+
+fragment_cache = FragmentCache()
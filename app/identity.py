@@ -0,0 +1,127 @@
+"""
+Kullanıcı kimliği önbelleği.
+
+İki katman:
+- Süreç içi: id -> oturumdan ayrılmış (detached) User kopyası, TTL'li ve
+  boyut sınırlı (LRU). user_loader her istekte buradan okur; kopya
+  db.session.merge(load=False) ile SQL çalıştırmadan oturuma eklenir.
+- İstek içi (flask.g): username -> User ve id -> User. Aynı istekte
+  blueprint'ler aynı kullanıcıyı tekrar sorgulamaz.
+
+Geçersizleme: profil düzenlemede forget_user çağrılır. Takip sayaçları
+User satırında tutulduğu için takip grafiği önbelleği bir kullanıcıyı
+attığında (yerel ya da diğer süreçlerden gelen değişiklik) burası da
+atılır (bkz. follow_graph.py). Diğer süreçlerdeki profil düzenlemeleri
+en fazla USER_CACHE_TTL saniye eski görünebilir.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from .models import db, User
+
+_lock = threading.Lock()
+_users = OrderedDict()  # user_id -> (son geçerlilik, detached User)
+
+
+def _detached_copy(user):
+    copy = User()
+    for attr in sa_inspect(User).column_attrs:
+        setattr(copy, attr.key, getattr(user, attr.key))
+    make_transient_to_detached(copy)
+    return copy
+
+
+def _remember(user):
+    config = current_app.config
+    expires = time.monotonic() + config.get("USER_CACHE_TTL", 60)
+    copy = _detached_copy(user)
+    with _lock:
+        _users[user.id] = (expires, copy)
+        _users.move_to_end(user.id)
+        while len(_users) > config.get("USER_CACHE_SIZE", 10_000):
+            _users.popitem(last=False)
+
+
+def _cached(user_id):
+    with _lock:
+        entry = _users.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _users[user_id]
+            return None
+        _users.move_to_end(user_id)
+        return entry[1]
+
+
+def forget_user(user_id):
+    with _lock:
+        _users.pop(user_id, None)
+    if has_request_context():
+        memo = g.get("identity_memo")
+        if memo:
+            user = memo["id"].pop(user_id, None)
+            for name in [n for n, u in memo["username"].items() if u is user]:
+                del memo["username"][name]
+
+
+def forget_all():
+    with _lock:
+        _users.clear()
+
+
+def _memo():
+    if not has_request_context():
+        return None
+    if "identity_memo" not in g:
+        g.identity_memo = {"id": {}, "username": {}}
+    return g.identity_memo
+
+
+def _memoize(user):
+    memo = _memo()
+    if memo is not None and user is not None:
+        memo["id"][user.id] = user
+        memo["username"][user.username] = user
+    return user
+
+
+def user_by_id(user_id):
+    """id ile kullanıcı: istek memosu -> süreç önbelleği -> veritabanı."""
+    memo = _memo()
+    if memo is not None and user_id in memo["id"]:
+        user = memo["id"][user_id]
+        # commit sonrası süresi dolan nesne önbellekten doldurulur (SELECT yerine)
+        if not sa_inspect(user).expired_attributes:
+            return user
+
+    cached = _cached(user_id)
+    if cached is not None:
+        return _memoize(db.session.merge(cached, load=False))
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        _remember(user)
+    return _memoize(user)
+
+
+def user_by_username(username):
+    """Kullanıcı adıyla kullanıcı (istek içinde tek sorgu), yoksa None."""
+    memo = _memo()
+    if memo is not None and username in memo["username"]:
+        return memo["username"][username]
+    return _memoize(User.query.filter_by(username=username).first())
+
+
+def load_session_user(user_id):
+    """Flask-Login user_loader: önbellekteki kopyayı SQL'siz oturuma ekler."""
+    from .follow_graph import sync
+
+    # Takip sayaçları değişen kullanıcıları (diğer süreçler dahil) önce at
+    sync()
+    return user_by_id(user_id)
@@ -0,0 +1,224 @@
+"""
+Poster / avatar görselleri için yerel vekil (proxy).
+
+Kartlardaki görseller image.tmdb.org, covers.openlibrary.org ve
+i.pravatar.cc'den doğrudan çekilmek yerine /img/<boyut>?u=<url> üzerinden
+sunulur: uzak görsel bir kez indirilir, Pillow ile sabit boyutlardan
+birine küçültülür, WebP (tarayıcı destekliyorsa) ya da JPEG olarak
+kodlanır ve diske yazılır. Sonraki istekler doğrudan diskten, uzun süreli
+önbellek başlıklarıyla döner.
+
+Disk önbelleği: dosya adı (url, boyut, biçim) üçlüsünün SHA-256 özeti,
+toplam boyut IMAGE_CACHE_MAX_BYTES'ı aşınca en uzun süredir kullanılmayan
+dosyalar silinir (erişim zamanı olarak mtime, günde en fazla bir kez
+güncellenir).
+
+Yalnızca IMAGE_PROXY_HOSTS'taki sunuculardan görsel çekilir. Uzak servis
+hata verirse orijinal URL'e yönlendirilir; sayfa görselsiz kalmaz.
+"""
+import hashlib
+import os
+import threading
+import time
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from flask import Blueprint, current_app, request, send_file, redirect, url_for, abort
+from PIL import Image, ImageOps, features
+
+from .external_api import image_upstream, UpstreamError
+from .jobs import handler
+
+# ad -> (genişlik, yükseklik, kare kırpma); ekrandaki boyutun ~2 katı (retina)
+SIZES = {
+    "avatar": (96, 96, True),
+    "avatar-lg": (256, 256, True),
+    "thumb": (160, 240, False),   # akış / profil / raf kapakları
+    "card": (320, 480, False),    # keşfet ve arama kartları
+    "full": (600, 900, False),    # içerik detay sayfası
+}
+POSTER_SIZES = ("thumb", "card", "full")
+FORMATS = ("webp", "jpeg")
+
+WARM_IMAGES = "warm_images"
+TOUCH_INTERVAL = 24 * 3600  # LRU için mtime güncelleme sıklığı
+
+bp = Blueprint("images", __name__)
+
+_lock = threading.Lock()
+_state = {"bytes": None}  # önbellek dizininin tahmini boyutu (ilk yazmada taranır)
+_webp = features.check("webp")
+
+
+class ImageProxyError(Exception):
+    """Görsel indirilemedi ya da çözülemedi."""
+
+
+def _config(key, default):
+    return current_app.config.get(key, default)
+
+
+def _cache_dir():
+    return _config("IMAGE_CACHE_DIR", None) or os.path.join(current_app.instance_path, "image_cache")
+
+
+def is_proxied(url):
+    if not url or not _config("IMAGE_PROXY_ENABLED", True):
+        return False
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and parts.netloc in _config("IMAGE_PROXY_HOSTS", ())
+
+
+def image_url(url, size="card"):
+    """Şablonlar için: izinli sunucudaki görselin vekil URL'i, değilse URL'in kendisi."""
+    if not is_proxied(url):
+        return url
+    return url_for("images.proxy", size=size, u=url)
+
+
+def _cache_path(url, size, fmt):
+    digest = hashlib.sha256(f"{size}|{fmt}|{url}".encode("utf-8")).hexdigest()
+    return os.path.join(_cache_dir(), digest[:2], digest[2:4], f"{digest}.{fmt}")
+
+
+# ------------------ GÖRSEL İŞLEME ------------------
+
+def fetch_source(url):
+    try:
+        return image_upstream(url).get_bytes(url, _config("IMAGE_PROXY_MAX_SOURCE_BYTES", 8 * 1024 * 1024))
+    except UpstreamError as e:
+        raise ImageProxyError(str(e)) from e
+
+
+def render_image(data, size, fmt):
+    """Kaynak baytları sabit boyuta küçült ve kodla."""
+    width, height, crop = SIZES[size]
+    try:
+        with Image.open(BytesIO(data)) as img:
+            # JPEG'i doğrudan küçük ölçekte çöz (tam boyut açmaktan çok daha hızlı)
+            img.draft("RGB", (width * 2, height * 2))
+            img = ImageOps.exif_transpose(img)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            if crop:
+                img = ImageOps.fit(img, (width, height), Image.LANCZOS)
+            else:
+                img.thumbnail((width, height), Image.LANCZOS)
+
+            out = BytesIO()
+            if fmt == "webp":
+                img.save(out, "WEBP", quality=80, method=4)
+            else:
+                img.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+            return out.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageProxyError(f"görsel çözülemedi: {e}") from e
+
+
+# ------------------ DİSK ÖNBELLEĞİ ------------------
+
+def _scan(root):
+    """[(mtime, boyut, yol), ...]"""
+    files = []
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+    return files
+
+
+def _evict(root, target):
+    files = sorted(_scan(root))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    return total
+
+
+def _store(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+    root = _cache_dir()
+    max_bytes = _config("IMAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+    with _lock:
+        if _state["bytes"] is None:
+            _state["bytes"] = sum(size for _, size, _ in _scan(root))
+        else:
+            _state["bytes"] += len(data)
+        if _state["bytes"] > max_bytes:
+            # Her seferinde değil, sınır aşılınca %90'a kadar boşalt
+            _state["bytes"] = _evict(root, int(max_bytes * 0.9))
+
+
+def _touch(path):
+    try:
+        if time.time() - os.path.getmtime(path) > TOUCH_INTERVAL:
+            os.utime(path)
+    except OSError:
+        pass
+
+
+def ensure_image(url, size, fmt, data=None):
+    """Önbellekteki dosyanın yolu; yoksa indirip üretir (data verilirse indirmez)."""
+    path = _cache_path(url, size, fmt)
+    if os.path.exists(path):
+        _touch(path)
+        return path
+    if data is None:
+        data = fetch_source(url)
+    _store(path, render_image(data, size, fmt))
+    return path
+
+
+# ------------------ ROUTE / İŞ ------------------
+
+@bp.route("/img/<string:size>")
+def proxy(size):
+    url = request.args.get("u", "")
+    if size not in SIZES or not is_proxied(url):
+        abort(404)
+
+    fmt = "webp" if _webp and "image/webp" in request.headers.get("Accept", "") else "jpeg"
+    try:
+        path = ensure_image(url, size, fmt)
+    except ImageProxyError as e:
+        print("[IMG] HATA:", e)
+        return redirect(url)
+
+    response = send_file(path, mimetype=f"image/{fmt}", max_age=_config("IMAGE_PROXY_MAX_AGE", 30 * 24 * 3600))
+    response.cache_control.public = True
+    response.vary.add("Accept")
+    return response
+
+
+@handler(WARM_IMAGES)
+def warm_images(payload):
+    """İçe aktarılan içeriğin kapağını tüm poster boyutlarında önceden üret."""
+    url = payload.get("url")
+    if not is_proxied(url):
+        return
+    data = None
+    for size in POSTER_SIZES:
+        for fmt in FORMATS:
+            if fmt == "webp" and not _webp:
+                continue
+            if data is None and not os.path.exists(_cache_path(url, size, fmt)):
+                try:
+                    data = fetch_source(url)
+                except ImageProxyError as e:
+                    raise UpstreamError(str(e)) from e  # geri çekilmeyle tekrar denensin
+            ensure_image(url, size, fmt, data=data)
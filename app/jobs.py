@@ -0,0 +1,257 @@
+"""
+SQLite'ta tutulan basit arka plan iş kuyruğu.
+
+İşler `jobs` tablosuna yazılır (enqueue), worker bunları tek tek sahiplenip
+(claim) kayıtlı handler ile çalıştırır. Hata alan iş üstel geri çekilmeyle
+(JOB_RETRY_BACKOFF * 2^(deneme-1) sn) yeniden denenir. max_attempts
+dolunca "failed" olarak kalır.
+
+Worker iki şekilde çalışabilir:
+  - JOBS_WORKER_THREAD açıksa ilk enqueue'da uygulama süreci içinde bir
+    daemon thread başlar,
+  - ya da ayrı bir süreçte `flask run-worker`.
+Sahiplenme tek bir UPDATE ... RETURNING ile yapıldığı için birden fazla
+worker aynı işi almaz. Çalışırken ölen worker'ın işi JOB_LEASE_SECONDS
+sonra tekrar kuyruğa döner.
+
+Biten ("done") işler JOB_RETENTION_DAYS sonra worker boşta kaldığında
+(en fazla JOB_PURGE_INTERVAL saniyede bir) silinir; "failed" işler
+incelenebilsin diye kalır.
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update, delete, func, and_, or_
+
+from .models import db, Job
+
+HANDLERS = {}
+
+_worker_lock = threading.Lock()
+_worker = {"thread": None, "wake": threading.Event()}
+
+PURGE_BATCH = 1000
+
+
+def handler(kind):
+    """İş türü için handler kaydı: @handler("enrich_tmdb")"""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, payload=None, ref_id=None, delay=0, max_attempts=None):
+    """
+    Kuyruğa iş ekle. Commit çağırana aittir; commit sonrası wake_worker()
+    çağrılırsa iş hemen alınır.
+    """
+    job = Job(
+        kind=kind,
+        ref_id=ref_id,
+        payload=json.dumps(payload or {}, ensure_ascii=False),
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts or current_app.config.get("JOB_MAX_ATTEMPTS", 5),
+    )
+    db.session.add(job)
+    return job
+
+
+def has_pending(kind, ref_id):
+    """ref_id için henüz bitmemiş (bekleyen / çalışan) iş var mı?"""
+    return db.session.query(
+        Job.query
+        .filter(Job.kind == kind, Job.ref_id == ref_id, Job.status.in_(("pending", "running")))
+        .exists()
+    ).scalar()
+
+
+def _claim(now, lease_seconds):
+    """Sıradaki çalışmaya hazır işi atomik olarak "running" yap ve döndür."""
+    lease_expired = now - timedelta(seconds=lease_seconds)
+    next_id = (
+        select(Job.id)
+        .where(
+            or_(
+                and_(Job.status == "pending", Job.run_at <= now),
+                and_(Job.status == "running", Job.started_at < lease_expired),
+            )
+        )
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = db.session.execute(
+        update(Job)
+        .where(Job.id == next_id)
+        .values(status="running", started_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.session.commit()
+    return row
+
+
+def _finish(job_id, **values):
+    db.session.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def run_next_job():
+    """
+    Hazır bir iş varsa çalıştır. Dönen: çalışan işin id'si ya da None.
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    row = _claim(now, config.get("JOB_LEASE_SECONDS", 300))
+    if row is None:
+        return None
+
+    job_id, kind, payload, attempts, max_attempts = row
+    try:
+        fn = HANDLERS[kind]
+        fn(json.loads(payload or "{}"))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"[JOBS] {kind}#{job_id} deneme {attempts} HATA:", e)
+        if attempts >= max_attempts:
+            _finish(job_id, status="failed", last_error=str(e), finished_at=datetime.utcnow())
+        else:
+            backoff = config.get("JOB_RETRY_BACKOFF", 60) * 2 ** (attempts - 1)
+            backoff *= random.uniform(0.8, 1.2)  # aynı anda düşen işler dağılsın
+            _finish(
+                job_id,
+                status="pending",
+                last_error=str(e),
+                run_at=datetime.utcnow() + timedelta(seconds=backoff),
+            )
+        return job_id
+
+    _finish(job_id, status="done", last_error=None, finished_at=datetime.utcnow())
+    return job_id
+
+
+def purge_finished_jobs(older_than_days):
+    """
+    finished_at'i older_than_days günden eski "done" işleri sil. Yazma kilidi
+    uzun tutulmasın diye PURGE_BATCH'lik gruplar halinde; dönen: silinen sayı.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    purged = 0
+    while True:
+        batch = (
+            select(Job.id)
+            .where(Job.status == "done", Job.finished_at < cutoff)
+            .limit(PURGE_BATCH)
+            .scalar_subquery()
+        )
+        result = db.session.execute(
+            delete(Job).where(Job.id.in_(batch)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        purged += result.rowcount
+        if result.rowcount < PURGE_BATCH:
+            return purged
+
+
+def _seconds_until_next_job(max_wait):
+    next_run = db.session.query(func.min(Job.run_at)).filter(Job.status == "pending").scalar()
+    db.session.commit()
+    if next_run is None:
+        return max_wait
+    return min(max_wait, max(0.0, (next_run - datetime.utcnow()).total_seconds()))
+
+
+def work(app, stop=None):
+    """İşleri sırayla çalıştır; kuyruk boşsa yeni iş ya da sıradaki run_at'i bekle."""
+    wake = _worker["wake"]
+    poll = app.config.get("JOB_POLL_INTERVAL", 5)
+    retention_days = app.config.get("JOB_RETENTION_DAYS", 7)
+    purge_interval = app.config.get("JOB_PURGE_INTERVAL", 3600)
+    purged_at = None
+    with app.app_context():
+        while stop is None or not stop.is_set():
+            try:
+                if run_next_job() is not None:
+                    continue
+                if purged_at is None or time.monotonic() - purged_at >= purge_interval:
+                    purged_at = time.monotonic()
+                    purge_finished_jobs(retention_days)
+                wait = _seconds_until_next_job(poll)
+            except Exception as e:
+                db.session.rollback()
+                print("[JOBS] worker HATA:", e)
+                wait = poll
+            finally:
+                db.session.remove()
+            wake.wait(wait)
+            wake.clear()
+
+
+def wake_worker_after_commit():
+    """Kuyruğa iş ekleyen transaction commit edilince worker'ı uyandır."""
+    db.session().after_commit(wake_worker)
+
+
+def wake_worker():
+    """Süreç içi worker'ı uyandır (yoksa ve JOBS_WORKER_THREAD açıksa başlat)."""
+    app = current_app._get_current_object()
+    if not app.config.get("JOBS_WORKER_THREAD", True):
+        return
+    with _worker_lock:
+        thread = _worker["thread"]
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=work, args=(app,), name="job-worker", daemon=True)
+            _worker["thread"] = thread
+            thread.start()
+    _worker["wake"].set()
+
+
+def queue_stats():
+    """Kuyruk derinliği ve gecikme ölçümleri (CLI ve /health/jobs için)."""
+    now = datetime.utcnow()
+    counts = dict(
+        db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+    )
+
+    oldest_ready = (
+        db.session.query(func.min(Job.created_at))
+        .filter(Job.status == "pending", Job.run_at <= now)
+        .scalar()
+    )
+
+    # Son bir saatte biten işler: kuyrukta bekleme ve toplam süre
+    recent = (
+        db.session.query(Job.created_at, Job.started_at, Job.finished_at)
+        .filter(Job.status == "done", Job.finished_at >= now - timedelta(hours=1))
+        .all()
+    )
+    total = sorted((f - c).total_seconds() for c, s, f in recent)
+    waits = sorted((s - c).total_seconds() for c, s, f in recent)
+
+    def pct(values, p):
+        if not values:
+            return None
+        return round(values[min(len(values) - 1, int(len(values) * p))], 3)
+
+    return {
+        "depth": {status: counts.get(status, 0) for status in ("pending", "running", "done", "failed")},
+        "oldest_ready_age": round((now - oldest_ready).total_seconds(), 3) if oldest_ready else None,
+        "last_hour": {
+            "done": len(recent),
+            "wait_p50": pct(waits, 0.5),
+            "wait_p95": pct(waits, 0.95),
+            "latency_p50": pct(total, 0.5),
+            "latency_p95": pct(total, 0.95),
+        },
+    }
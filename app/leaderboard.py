@@ -0,0 +1,108 @@
+"""
+Popüler kullanıcılar (takipçi sayısına göre top-K) ve kullanıcı arama.
+
+Liste süreç içinde önbellekte tutulur ve follow / unfollow ile artımlı
+olarak güncellenir; LEADERBOARD_TTL süresi dolunca (ya da eksildiğinde)
+users.follower_count indeksinden yeniden okunur. Böylece diğer worker'ların
+yaptığı değişiklikler de en geç TTL kadar gecikmeyle yansır.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from .models import db, User
+
+# Önbellekte tutulan aday sayısı (gösterilenden fazla; düşenlerin yerine geçer)
+CAPACITY = 50
+
+LeaderboardEntry = namedtuple("LeaderboardEntry", "id username follower_count")
+
+_lock = threading.Lock()
+_state = {
+    "entries": [],       # (follower_count, id) azalan sırasına göre LeaderboardEntry listesi
+    "complete": False,   # tablodaki tüm kullanıcılar listede mi?
+    "loaded_at": None,
+}
+
+
+def _sort_key(entry):
+    return (-entry.follower_count, -entry.id)
+
+
+def _reload():
+    users = (
+        User.query
+        .with_entities(User.id, User.username, User.follower_count)
+        .order_by(User.follower_count.desc(), User.id.desc())
+        .limit(CAPACITY)
+        .all()
+    )
+    _state["entries"] = [LeaderboardEntry(*u) for u in users]
+    _state["complete"] = len(users) < CAPACITY
+    _state["loaded_at"] = time.monotonic()
+
+
+def _is_stale(limit):
+    if _state["loaded_at"] is None:
+        return True
+    ttl = current_app.config.get("LEADERBOARD_TTL", 60)
+    if time.monotonic() - _state["loaded_at"] > ttl:
+        return True
+    return len(_state["entries"]) < limit and not _state["complete"]
+
+
+def get_popular_users(limit=10):
+    """En çok takipçili `limit` kullanıcı: [LeaderboardEntry, ...]"""
+    with _lock:
+        if _is_stale(limit):
+            _reload()
+        return _state["entries"][:limit]
+
+
+def record_follower_count(user, follower_count):
+    """
+    follow / unfollow sonrası kullanıcının yeni takipçi sayısını listeye işle.
+    Liste transaction commit edilince güncellenir; rollback olursa değişmez.
+    """
+    entry = LeaderboardEntry(user.id, user.username, follower_count)
+    db.session().after_commit(lambda: _apply_entry(entry))
+
+
+def _apply_entry(entry):
+    with _lock:
+        if _state["loaded_at"] is None:
+            return
+
+        entries = [e for e in _state["entries"] if e.id != entry.id]
+
+        # Son adaydan öndeyse listeye girer. Değilse listeden düşmüştür: yerine
+        # kimin geçeceği bilinmediği için liste kısalır, azalınca yeniden yüklenir.
+        if _state["complete"] or (entries and _sort_key(entry) < _sort_key(entries[-1])):
+            entries.append(entry)
+
+        entries.sort(key=_sort_key)
+        if len(entries) > CAPACITY:
+            entries = entries[:CAPACITY]
+            _state["complete"] = False
+        _state["entries"] = entries
+
+
+def search_users(q, limit=10):
+    """
+    Kullanıcı adına göre önek araması (büyük/küçük harf duyarsız).
+    lower(username) ifade indeksi üzerinde aralık taraması + LIMIT.
+    """
+    prefix = q.strip().lower()
+    if not prefix:
+        return []
+    username = func.lower(User.username)
+    return (
+        User.query
+        .filter(username >= prefix, username < prefix + "\U0010ffff")
+        .order_by(username)
+        .limit(limit)
+        .all()
+    )
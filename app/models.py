@@ -1,8 +1,11 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event, DDL
 
-db = SQLAlchemy()
+from .db_engine import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # Kullanıcı
 class User(UserMixin, db.Model):
@@ -16,6 +19,16 @@ class User(UserMixin, db.Model):
     bio = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Denormalize sayaçlar (follow / unfollow ile güncellenir, bkz. counters.py)
+    follower_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    following_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Popüler kullanıcılar ve kullanıcı adı önek araması için
+        db.Index("ix_users_follower_count", "follower_count"),
+        db.Index("ix_users_username_lower", db.func.lower(username)),
+    )
+
     ratings = db.relationship("Rating", backref="user", lazy="dynamic")
     reviews = db.relationship("Review", backref="user", lazy="dynamic")
     lists = db.relationship("UserList", backref="owner", lazy="dynamic")
@@ -37,30 +50,46 @@ class User(UserMixin, db.Model):
         cascade="all, delete-orphan",
     )
 
-    def follower_count(self):
-        return self.followers.count()
-
-    def following_count(self):
-        return self.following.count()
-
     def is_following(self, user):
+        from .follow_graph import is_following
+
         if not user or not getattr(user, "id", None):
             return False
-        return (
-            self.following.filter(Follow.followed_id == user.id).count() > 0
-        )
+        return is_following(self.id, user.id)
 
     def follow(self, user):
-        if not self.is_following(user) and self.id != user.id:
+        from .timeline import backfill_timeline
+        from .counters import bump_follow_counts
+        from .leaderboard import record_follower_count
+        from .follow_graph import record_follow_change
+
+        if self.id == user.id:
+            return
+        # Yazma yolunda önbelleğe değil veritabanına bakılır
+        if self.following.filter(Follow.followed_id == user.id).first() is None:
             f = Follow(follower_id=self.id, followed_id=user.id)
             db.session.add(f)
+            count = bump_follow_counts(self.id, user.id, 1)
+            record_follower_count(user, count)
+            backfill_timeline(self, user)
+            record_follow_change(self.id, user.id)
 
     def unfollow(self, user):
+        from .timeline import prune_timeline, follower_count_changed
+        from .counters import bump_follow_counts
+        from .leaderboard import record_follower_count
+        from .follow_graph import record_follow_change
+
         if self.id == user.id:
             return
         f = self.following.filter(Follow.followed_id == user.id).first()
         if f:
             db.session.delete(f)
+            count = bump_follow_counts(self.id, user.id, -1)
+            record_follower_count(user, count)
+            prune_timeline(self, user)
+            follower_count_changed(user, count, -1)
+            record_follow_change(self.id, user.id)
 
     def __repr__(self):
         return f"<User {self.username}>"
@@ -75,6 +104,9 @@ class Follow(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("follower_id", "followed_id", name="uq_follow"),
+        # Takipçi listesi (profil) ve takipçi sayımı için
+        db.Index("ix_follow_followed_created", "followed_id", "created_at"),
+        db.Index("ix_follow_follower_created", "follower_id", "created_at"),
     )
 
 
@@ -91,11 +123,39 @@ class Content(db.Model):
     poster_url = db.Column(db.String(255))
     meta_json = db.Column(db.Text)  # Diğer meta bilgiler (JSON string)
 
+    __table_args__ = (
+        # Aynı dış kaydın iki kez eklenmemesi ve toplu içe aktarmada UPSERT için
+        db.Index("uq_contents_source_external", "source", "external_id", unique=True),
+    )
+
     ratings = db.relationship("Rating", backref="content", lazy="dynamic")
     reviews = db.relationship("Review", backref="content", lazy="dynamic")
     list_items = db.relationship("ListItem", backref="content", lazy="dynamic")
     activities = db.relationship("Activity", backref="content", lazy="dynamic")
 
+# İçerik istatistikleri (keşfet listeleri için, yazma anında güncellenir)
+class ContentStats(db.Model):
+    __tablename__ = "content_stats"
+
+    content_id = db.Column(db.Integer, db.ForeignKey("contents.id"), primary_key=True)
+    type = db.Column(db.String(10), nullable=False)          # Content.type kopyası
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    avg_score = db.Column(db.Float, nullable=False, default=0)
+    list_count = db.Column(db.Integer, nullable=False, default=0)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    popularity = db.Column(db.Integer, nullable=False, default=0)  # list_count + review_count
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    content = db.relationship("Content", backref=db.backref("stats", uselist=False))
+
+    __table_args__ = (
+        db.Index("ix_content_stats_type_avg", "type", "avg_score"),
+        db.Index("ix_content_stats_type_popularity", "type", "popularity"),
+        # Keşfet sayfalarının ETag damgası: türdeki en son güncelleme
+        db.Index("ix_content_stats_type_updated", "type", "updated_at"),
+    )
+
 # Puanlama
 class Rating(db.Model):
     __tablename__ = "ratings"
@@ -108,8 +168,36 @@ class Rating(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("user_id", "content_id", name="uix_user_content_rating"),
+        db.Index("ix_ratings_content", "content_id"),
+    )
+
+# İçerik benzerlikleri: her içerik için en benzer TOP_N içerik (bkz. recommendations.py)
+class ContentSimilarity(db.Model):
+    __tablename__ = "content_similarities"
+
+    content_id = db.Column(db.Integer, db.ForeignKey("contents.id"), primary_key=True)
+    similar_id = db.Column(db.Integer, db.ForeignKey("contents.id"), primary_key=True)
+    score = db.Column(db.Float, nullable=False)  # düzeltilmiş kosinüs benzerliği (0, 1]
+
+    __table_args__ = (
+        # Detay sayfası: tek indeksli okuma, skora göre sıralı
+        db.Index("ix_content_similarities_content_score", "content_id", "score"),
+        # Artımlı yenilemede ters yön (bu içeriği listesinde tutanlar)
+        db.Index("ix_content_similarities_similar", "similar_id"),
     )
 
+
+# Benzerlik hesaplama çalıştırmaları; son bitenin başlangıcı artımlı yenilemenin eşiği
+class SimilarityRun(db.Model):
+    __tablename__ = "similarity_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    full = db.Column(db.Boolean, nullable=False, default=False)
+    items = db.Column(db.Integer, nullable=False, default=0)   # yeniden hesaplanan içerik sayısı
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime)
+
+
 # Yorum
 class Review(db.Model):
     __tablename__ = "reviews"
@@ -121,6 +209,11 @@ class Review(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Detay sayfasındaki yorumlar (yeniden eskiye)
+        db.Index("ix_reviews_content_created", "content_id", "created_at"),
+    )
+
 # Kullanıcı listeleri (okunacak, izlenecek vs.)
 class UserList(db.Model):
     __tablename__ = "user_lists"
@@ -131,6 +224,12 @@ class UserList(db.Model):
     description = db.Column(db.Text)
     is_default = db.Column(db.Boolean, default=False)
     list_type = db.Column(db.String(20), nullable=False)  # "watch", "read", "custom"
+    shelf = db.Column(db.String(20))  # profil rafı: "watched" / "watchlist" / "read" / "toread" (bkz. shelves.py)
+
+    __table_args__ = (
+        db.Index("ix_user_lists_user_type", "user_id", "list_type"),
+        db.Index("ix_user_lists_user_shelf", "user_id", "shelf", unique=True),
+    )
 
     items = db.relationship("ListItem", backref="user_list", lazy="dynamic")
 
@@ -144,6 +243,10 @@ class ListItem(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("list_id", "content_id", name="uix_list_content"),
+        # İçeriğin hangi listelerde olduğu
+        db.Index("ix_list_items_content", "content_id"),
+        # Raflar: listedeki en son eklenenler
+        db.Index("ix_list_items_list_added", "list_id", "added_at"),
     )
 
 # Aktivite (feed için)
@@ -157,6 +260,18 @@ class Activity(db.Model):
     ref_id = db.Column(db.Integer)  # ilgili rating/review/list_item id’si
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Denormalize sayaçlar (beğeni / yorum ile güncellenir, bkz. counters.py)
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Akış kartı önbelleğinin sürümü: beğeni, yorum ve puan düzenlemesinde artar
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Profil / akış sıralaması ve keyset sayfalama (created_at, id) için
+        db.Index("ix_activities_user_created_id", "user_id", "created_at", "id"),
+        # Puan düzenleme / liste öğesi silme: ilgili kartların sürümünü artırmak için
+        db.Index("ix_activities_type_ref", "activity_type", "ref_id"),
+    )
 
     likes = db.relationship("ActivityLike", backref="activity", lazy="dynamic", cascade="all, delete-orphan"
 )
@@ -187,4 +302,71 @@ class ActivityComment(db.Model):
     text = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    user = db.relationship("User", backref=db.backref("activity_comments", lazy="dynamic"))
\ No newline at end of file
+    user = db.relationship("User", backref=db.backref("activity_comments", lazy="dynamic"))
+
+    __table_args__ = (
+        # Kartlardaki yorumlar (eskiden yeniye)
+        db.Index("ix_activity_comments_activity_created", "activity_id", "created_at"),
+    )
+
+
+# Takip değişiklik günlüğü: süreçlerin takip grafiği önbelleğini geçersizlemesi için (bkz. follow_graph.py)
+class FollowGraphLog(db.Model):
+    __tablename__ = "follow_graph_log"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)   # takip listesi değişen kullanıcı
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# Kullanıcının ana sayfa akışı (fan-out-on-write "inbox")
+class TimelineEntry(db.Model):
+    __tablename__ = "timeline_entries"
+
+    id = db.Column(db.Integer, primary_key=True)
+    owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)   # akışın sahibi
+    activity_id = db.Column(db.Integer, db.ForeignKey("activities.id"), nullable=False)
+    actor_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)   # aktiviteyi yapan
+    created_at = db.Column(db.DateTime, nullable=False)  # Activity.created_at kopyası
+
+    __table_args__ = (
+        db.UniqueConstraint("owner_id", "activity_id", name="uq_timeline_owner_activity"),
+        db.Index("ix_timeline_owner_created", "owner_id", "created_at", "activity_id"),
+        db.Index("ix_timeline_owner_actor", "owner_id", "actor_id"),
+    )
+
+
+# Arka plan iş kuyruğu (bkz. jobs.py)
+class Job(db.Model):
+    __tablename__ = "jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)          # ör. "enrich_tmdb"
+    ref_id = db.Column(db.Integer)                           # ilgili kayıt (ör. content.id)
+    payload = db.Column(db.Text)                             # JSON
+    status = db.Column(db.String(10), nullable=False, default="pending")  # pending/running/done/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # en erken çalışma zamanı
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_at", "status", "run_at"),
+        db.Index("ix_jobs_kind_ref", "kind", "ref_id"),
+        # Biten işlerin temizliği ve /health/jobs'un son bir saat ölçümleri
+        db.Index("ix_jobs_status_finished", "status", "finished_at"),
+    )
+
+
+# Katalog araması için FTS5 sanal tablosu (bkz. search_index.py).
+# create_all ile birlikte, tablo yoksa oluşturulur.
+def _create_content_fts(target, connection, **kw):
+    from .search_index import CONTENT_FTS_DDL
+
+    connection.execute(DDL(CONTENT_FTS_DDL))
+
+
+event.listen(db.metadata, "after_create", _create_content_fts)
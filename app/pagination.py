@@ -0,0 +1,43 @@
+"""
+Keyset (cursor) sayfalama yardımcıları.
+
+Cursor, son gösterilen satırın sıralama anahtarının (ör. created_at, id)
+JSON + base64 ile paketlenmiş halidir; istemci için opaktır.
+"""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values):
+    parts = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(parts, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Cursor'ı değer listesine çevir; bozuk cursor için None döner."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        parts = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return parts if isinstance(parts, list) else None
+
+
+def decode_time_cursor(token):
+    """(created_at, id) cursor'ı; geçersizse None."""
+    parts = decode_cursor(token)
+    try:
+        created_at, row_id = parts
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def keyset_page(query, limit):
+    """limit + 1 satır çekerek (COUNT olmadan) sonraki sayfa olup olmadığını bul."""
+    rows = query.limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
@@ -1,122 +1,102 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from bisect import bisect_right
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required, current_user
-from ..models import db, User, UserList, Activity, Follow, ListItem
+from sqlalchemy.orm import joinedload
+from ..models import db, User, Activity, Follow
+from ..shelves import SHELVES, load_shelves, shelf_page
+from ..identity import user_by_username, forget_user
+from ..follow_graph import follower_ids, following_ids
+from ..pagination import encode_cursor, decode_cursor
 
 bp = Blueprint("profile", __name__, template_folder="../templates/profile")
 
-@bp.route("/<string:username>")
-@login_required
-def view_profile(username):
-    user = User.query.filter_by(username=username).first_or_404()
+PREVIEW_USERS = 8
+FOLLOW_PAGE_SIZE = 48
 
-    # Kullanıcının listeleri ve aktiviteleri (soldaki aktiviteler için)
-    lists = (
-        UserList.query
-        .filter_by(user_id=user.id)
-        .order_by(UserList.is_default.desc(), UserList.id)
+
+def _user_or_404(username):
+    # İstek içinde aynı kullanıcı adı tekrar sorgulanmaz (bkz. identity.py)
+    user = user_by_username(username)
+    if user is None:
+        abort(404)
+    return user
+
+
+def _recent_followers(user):
+    """Son takipçiler (en fazla PREVIEW_USERS kişi)."""
+    return (
+        User.query
+        .join(Follow, Follow.follower_id == User.id)
+        .filter(Follow.followed_id == user.id)
+        .order_by(Follow.created_at.desc())
+        .limit(PREVIEW_USERS)
         .all()
     )
 
+
+@bp.route("/<string:username>")
+@login_required
+def view_profile(username):
+    user = _user_or_404(username)
+
+    # Son aktiviteler (soldaki kolon), içerikleriyle birlikte
     activities = (
         Activity.query
+        .options(joinedload(Activity.content))
         .filter_by(user_id=user.id)
-        .order_by(Activity.created_at.desc())
+        .order_by(Activity.created_at.desc(), Activity.id.desc())
         .limit(20)
         .all()
     )
 
     is_owner = (current_user.id == user.id)
 
-    # Takipçi / takip edilen
-    followers_rel = user.followers.order_by(Follow.created_at.desc()).all()
-    following_rel = user.following.order_by(Follow.created_at.desc()).all()
-    followers = [f.follower for f in followers_rel]
-    following = [f.followed for f in following_rel]
-
-    followers_count = len(followers)
-    following_count = len(following)
+    # Takipçi / takip edilen sayıları sayaçlardan; sayfada yalnızca takipçi önizlemesi var
+    followers = _recent_followers(user)
 
     is_following = False
     if not is_owner:
         is_following = current_user.is_following(user)
 
-    # ----- KÜTÜPHANE RAF VERİLERİ -----
-    # Amaç: listelerin ismine güvenmeden, list_type + is_default üzerinden
-    # "izlenen / izlenecek / okunan / okunacak" raflarını doldurmak.
-
-    def _default_lists(list_type: str):
-        return (
-            UserList.query
-            .filter_by(user_id=user.id, list_type=list_type, is_default=True)
-            .order_by(UserList.id)
-            .all()
-        )
-
-    def _items_for_list(lst: UserList):
-        if not lst:
-            return []
-        return (
-            ListItem.query
-            .filter_by(list_id=lst.id)
-            .order_by(ListItem.added_at.desc())
-            .all()
-        )
-
-    watch_defaults = _default_lists("watch")  # film listeleri
-    read_defaults = _default_lists("read")    # kitap listeleri
-
-    watched_items = []
-    watchlist_items = []
-    read_items = []
-    toread_items = []
-
-    # --- Film listelerini isim + fallback ile paylaştır ---
-    for lst in watch_defaults:
-        name = (lst.name or "").lower()
-        if "izlenecek" in name or "to watch" in name or "watchlist" in name:
-            watchlist_items = _items_for_list(lst)
-        elif "izlenen" in name or "izlediklerim" in name or "watched" in name:
-            watched_items = _items_for_list(lst)
-
-    # Eğer isimlerden yakalayamadıysak, sırayla ver:
-    # 1. default liste = izlenecek, 2. default liste = izlenen
-    if not watchlist_items and watch_defaults:
-        watchlist_items = _items_for_list(watch_defaults[0])
-    if not watched_items and len(watch_defaults) > 1:
-        watched_items = _items_for_list(watch_defaults[1])
-
-    # --- Kitap listelerini isim + fallback ile paylaştır ---
-    for lst in read_defaults:
-        name = (lst.name or "").lower()
-        if "okunacak" in name or "to read" in name:
-            toread_items = _items_for_list(lst)
-        elif "okunan" in name or "okuduklarım" in name or "read" in name:
-            read_items = _items_for_list(lst)
-
-    # fallback: 1. liste = okunacak, 2. liste = okunan
-    if not toread_items and read_defaults:
-        toread_items = _items_for_list(read_defaults[0])
-    if not read_items and len(read_defaults) > 1:
-        read_items = _items_for_list(read_defaults[1])
+    # Kütüphane rafları: tek sorguda her raftan en son eklenenler
+    shelves = load_shelves(user)
 
     return render_template(
         "profile/profile.html",
         profile_user=user,
-        lists=lists,
         activities=activities,
         is_owner=is_owner,
         followers=followers,
-        following=following,
-        followers_count=followers_count,
-        following_count=following_count,
+        followers_count=user.follower_count,
+        following_count=user.following_count,
         is_following=is_following,
-        watched_items=watched_items,
-        watchlist_items=watchlist_items,
-        read_items=read_items,
-        toread_items=toread_items,
+        shelves=shelves,
     )
 
 
+@bp.route("/<string:username>/shelf/<string:shelf>")
+@login_required
+def view_shelf(username, shelf):
+    """Bir rafın tamamı, sayfalı (en son eklenenden geriye)."""
+    if shelf not in SHELVES:
+        abort(404)
+    user = _user_or_404(username)
+
+    page = shelf_page(user, shelf, request.args.get("cursor", ""))
+    if page is None:
+        abort(404)
+    items, next_cursor = page
+
+    return render_template(
+        "profile/shelf.html",
+        profile_user=user,
+        shelf=shelf,
+        title=SHELVES[shelf][0],
+        items=items,
+        next_cursor=next_cursor,
+    )
+
 
 @bp.route("/<string:username>/edit", methods=["GET", "POST"])
 @login_required
@@ -145,6 +125,7 @@ def edit_profile(username):
             current_user.avatar_url = avatar_url
             current_user.bio = bio
             db.session.commit()
+            forget_user(current_user.id)
             flash("Profiliniz güncellendi.", "success")
             return redirect(url_for("profile.view_profile", username=current_user.username))
 
@@ -154,6 +135,23 @@ def edit_profile(username):
     )
 
 
+def _follow_page(user, list_type, cursor):
+    """
+    Takipçiler / takip edilenler sayfası: (kullanıcılar, sonraki cursor | None).
+    id'ler takip grafiği önbelleğinden (id sırasıyla), kullanıcılar tek sorguyla.
+    """
+    ids = follower_ids(user.id) if list_type == "followers" else following_ids(user.id)
+    after = decode_cursor(cursor)
+    start = bisect_right(ids, after[0]) if after and isinstance(after[0], int) else 0
+    page = list(ids[start:start + FOLLOW_PAGE_SIZE])
+    if not page:
+        return [], None
+
+    users = {u.id: u for u in User.query.filter(User.id.in_(page))}
+    next_cursor = encode_cursor(page[-1]) if start + len(page) < len(ids) else None
+    return [users[uid] for uid in page if uid in users], next_cursor
+
+
 @bp.route("/<string:username>/<string:list_type>")
 @login_required
 def view_follow_list(username, list_type):
@@ -161,26 +159,25 @@ def view_follow_list(username, list_type):
     /profil/kübra/followers veya /profil/kübra/following gibi
     takipçi / takip edilen listelerini gösteren sayfa.
     """
-    user = User.query.filter_by(username=username).first_or_404()
+    user = _user_or_404(username)
 
     if list_type == "followers":
-        rels = user.followers.order_by(Follow.created_at.desc()).all()
         title = "Takipçiler"
-        users = [f.follower for f in rels]
     elif list_type == "following":
-        rels = user.following.order_by(Follow.created_at.desc()).all()
         title = "Takip Edilenler"
-        users = [f.followed for f in rels]
     else:
         flash("Geçersiz liste türü.", "danger")
         return redirect(url_for("profile.view_profile", username=username))
 
+    users, next_cursor = _follow_page(user, list_type, request.args.get("cursor", ""))
+
     return render_template(
         "profile/follow_list.html",
         profile_user=user,
         users=users,
         list_type=list_type,
         title=title,
+        next_cursor=next_cursor,
     )
 
 
@@ -188,7 +185,7 @@ def view_follow_list(username, list_type):
 @bp.route("/<string:username>/follow", methods=["POST"])
 @login_required
 def follow_user(username):
-    user = User.query.filter_by(username=username).first_or_404()
+    user = _user_or_404(username)
 
     if user.id == current_user.id:
         flash("Kendinizi takip edemezsiniz.", "warning")
@@ -203,7 +200,7 @@ def follow_user(username):
 @bp.route("/<string:username>/unfollow", methods=["POST"])
 @login_required
 def unfollow_user(username):
-    user = User.query.filter_by(username=username).first_or_404()
+    user = _user_or_404(username)
 
     if user.id == current_user.id:
         flash("Kendinizden takip kaldıramazsınız.", "warning")
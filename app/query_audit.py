@@ -0,0 +1,209 @@
+"""
+Sıcak route'ların sorgu planı denetimi (`flask query-audit`).
+
+Geçici bir SQLite veritabanı oluşturulur, route'lar üzerinden küçük bir
+veri kümesi eklenir (kayıt, takip, içe aktarma, puan, yorum, liste,
+beğeni...), ardından sık kullanılan sayfalar test client ile gezilir.
+Bu sırada çalışan her SELECT yakalanır ve aynı parametrelerle
+EXPLAIN QUERY PLAN'dan geçirilir. İndeks kullanmadan tüm tabloyu tarayan
+("SCAN <tablo>") her sorgu raporlanır; komut bu durumda hata koduyla biter.
+"""
+import os
+import re
+import shutil
+import tempfile
+
+from sqlalchemy import event
+
+# Plan satırı: "SCAN users" / "SCAN a AS b" (indeks yok) -> tam tarama
+_FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+# Bilerek tüm tabloyu okuyan sorgular: (route öneki, tablo) -> gerekçe
+ALLOWED_SCANS = {
+    ("/autocomplete", "contents"): "önek indeksi yüklenirken tüm başlıklar okunur",
+    ("/autocomplete", "users"): "önek indeksi yüklenirken tüm kullanıcı adları okunur",
+}
+
+SEED_USERS = ("alice", "bob", "carol", "dave")
+
+
+def _audit_config(base_config, db_path):
+    class AuditConfig(base_config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+        JOBS_WORKER_THREAD = False                 # zenginleştirme işleri kuyrukta kalsın
+        FEDERATED_SEARCH_SOURCES = ("local",)      # dış servislere gidilmesin
+        AUTOCOMPLETE_PRELOAD = False               # önek indeksi istekte kurulsun (denetlensin)
+
+    return AuditConfig
+
+
+def _login(client, username):
+    client.post("/auth/login", data={"email": f"{username}@example.com", "password": "audit-pass"})
+
+
+def seed_sample_data(app):
+    """Route'lar üzerinden örnek veri ekle; (kullanıcı -> client, içerik id'leri) döner."""
+    clients = {}
+    for name in SEED_USERS:
+        client = app.test_client()
+        client.post(
+            "/auth/register",
+            data={
+                "username": name,
+                "email": f"{name}@example.com",
+                "password": "audit-pass",
+                "password2": "audit-pass",
+            },
+        )
+        _login(client, name)
+        clients[name] = client
+
+    for name in SEED_USERS[1:]:
+        clients["alice"].post(f"/profile/{name}/follow")
+    clients["bob"].post("/profile/carol/follow")
+
+    content_ids = []
+    for i in range(6):
+        source, ctype = ("tmdb", "movie") if i % 2 == 0 else ("openlibrary", "book")
+        response = clients["bob"].post(
+            "/content/import",
+            data={
+                "external_id": f"audit-{i}",
+                "source": source,
+                "type": ctype,
+                "title": f"Denetim İçeriği {i}",
+                "year": "2001",
+                "poster_url": "",
+            },
+        )
+        content_ids.append(int(response.headers["Location"].rstrip("/").split("/")[-1]))
+
+    with app.app_context():
+        from .models import UserList, User
+
+        lists_by_user = {}
+        for name in SEED_USERS[1:]:
+            user = User.query.filter_by(username=name).first()
+            lists_by_user[name] = {l.list_type: l.id for l in UserList.query.filter_by(user_id=user.id)}
+
+    # İstekler açık bir app context içinde yapılmamalı: aynı `g` paylaşılır ve
+    # oturum kullanıcısı ilk istekteki kullanıcı olarak kalır
+    for name, lists in lists_by_user.items():
+        client = clients[name]
+        for i, cid in enumerate(content_ids):
+            client.post(f"/content/{cid}", data={"score": str(5 + i % 5)})
+            client.post(f"/content/{cid}", data={"review_text": f"{name} yorumu {i}"})
+            client.post(f"/content/{cid}", data={"list_id": lists["watch" if i % 2 == 0 else "read"]})
+
+    # Akıştaki birkaç aktiviteye beğeni ve yorum
+    with app.app_context():
+        from .models import Activity
+
+        activity_ids = [a.id for a in Activity.query.order_by(Activity.id.desc()).limit(5)]
+    for activity_id in activity_ids:
+        clients["alice"].post(f"/activities/{activity_id}/like")
+        clients["alice"].post(f"/activities/{activity_id}/comment", data={"text": "güzel"})
+
+    return clients, content_ids
+
+
+def _hot_routes(client, content_ids):
+    """Denetlenecek GET istekleri; sayfalama cursor'ları ilk sayfalardan alınır."""
+    routes = [
+        "/",
+        "/?user_q=ca",
+        "/movies/top-rated",
+        "/movies/popular",
+        "/books/top-rated",
+        "/books/popular",
+        "/search?q=denetim",
+        "/search/movies",
+        "/search/books",
+        "/autocomplete?q=den",
+        "/autocomplete?q=ca&kind=user",
+        f"/content/{content_ids[0]}",
+        f"/content/{content_ids[1]}",
+        "/profile/alice",
+        "/profile/bob",
+        "/profile/bob/shelf/watched",
+        "/profile/bob/followers",
+    ]
+    for path in routes:
+        yield path
+
+    next_cursor = client.get("/more").get_json().get("next_cursor")
+    if next_cursor:
+        yield f"/more?cursor={next_cursor}"
+    yield "/more"
+    yield "/catalog/movie/popular/more"
+
+
+def _explain(connection, statement, parameters):
+    cursor = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    return [row[-1] for row in cursor]
+
+
+def run_query_audit(config_class, verbose=False):
+    """
+    Denetimi çalıştır. Dönen: (denetlenen sorgu sayısı, sorun listesi)
+    sorun: (route, tablo, plan satırı, sql)
+    """
+    from . import create_app
+    from .models import db
+
+    tmp_dir = tempfile.mkdtemp(prefix="query-audit-")
+    try:
+        app = create_app(_audit_config(config_class, os.path.join(tmp_dir, "audit.db")))
+        table_names = set()
+        with app.app_context():
+            db.create_all(bind_key=None)
+            table_names = set(db.metadata.tables)
+
+        clients, content_ids = seed_sample_data(app)
+        client = clients["alice"]
+
+        captured = []
+        current = {"path": None}
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if current["path"] and statement.lstrip().upper().startswith("SELECT"):
+                captured.append((current["path"], statement, parameters))
+
+        # GET sorguları "readonly" bind'e gidebilir; tüm motorları dinle
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", capture)
+        try:
+            for path in _hot_routes(client, content_ids):
+                current["path"] = path
+                response = client.get(path)
+                current["path"] = None
+                if response.status_code >= 400:
+                    print(f"  ! {path} -> HTTP {response.status_code}")
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", capture)
+
+        problems = []
+        seen = set()
+        with app.app_context(), db.engine.connect() as connection:
+            for path, statement, parameters in captured:
+                key = (path.split("?")[0], statement)
+                if key in seen:
+                    continue
+                seen.add(key)
+                for detail in _explain(connection, statement, parameters):
+                    if verbose:
+                        print(f"  {path}: {detail}")
+                    match = _FULL_SCAN_RE.match(detail)
+                    if not match or match.group(1) not in table_names:
+                        continue  # indeksli erişim ya da alt sorgu / FTS taraması
+                    table = match.group(1)
+                    if any(path.startswith(p) and table == t for p, t in ALLOWED_SCANS):
+                        continue
+                    problems.append((path, table, detail, " ".join(statement.split())))
+        return len(seen), problems
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
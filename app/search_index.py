@@ -0,0 +1,149 @@
+"""
+Yerel katalog için SQLite FTS5 tam metin indeksi (content_fts).
+
+Sanal tablonun rowid'si content.id'dir. Başlık, yıl, yönetmen, oyuncular,
+türler ve yazarlar indekslenir. Metin hem yazılırken hem aranırken
+fold_text ile katlanır: Türkçe İ/ı/I ve şapkalı/noktalı harfler sade
+küçük harfe iner ("İstanbul" = "istanbul", "Şahin" = "sahin"). FTS5'in
+unicode61 tokenizer'ı büyük/küçük harf ayrımını bu dillerde doğru
+yapamadığı için katlama Python tarafında yapılır.
+"""
+import json
+import re
+import unicodedata
+
+from sqlalchemy import text
+
+from .models import db, Content
+
+FTS_COLUMNS = ("title", "year", "director", "cast", "genres", "authors")
+
+# bm25 sütun ağırlıkları (FTS_COLUMNS sırasıyla): başlık eşleşmesi en değerlisi
+BM25_WEIGHTS = (10.0, 1.0, 4.0, 2.0, 1.0, 4.0)
+
+CONTENT_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5("
+    + ", ".join(FTS_COLUMNS)
+    + ", tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+_TURKISH_MAP = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fold_text(value):
+    """Türkçe duyarlı katlama: küçük harf + aksan/nokta temizliği."""
+    if not value:
+        return ""
+    value = str(value)
+    if value.isascii():
+        return value.lower()
+    value = value.translate(_TURKISH_MAP).lower()
+    value = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in value if not unicodedata.combining(ch))
+
+
+def _join(value):
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value if v)
+    return value or ""
+
+
+def _fts_row(content_id, title, year, meta_json):
+    try:
+        meta = json.loads(meta_json) if meta_json else {}
+    except (ValueError, TypeError):
+        meta = {}
+    return {
+        "rowid": content_id,
+        "title": fold_text(title),
+        "year": str(year) if year else "",
+        "director": fold_text(_join(meta.get("director"))),
+        "cast": fold_text(_join(meta.get("cast"))),
+        "genres": fold_text(_join(meta.get("genres"))),
+        "authors": fold_text(_join(meta.get("authors"))),
+    }
+
+
+_UPSERT_SQL = text(
+    "INSERT OR REPLACE INTO content_fts (rowid, "
+    + ", ".join(FTS_COLUMNS)
+    + ") VALUES (:rowid, "
+    + ", ".join(f":{c}" for c in FTS_COLUMNS)
+    + ")"
+)
+
+
+def index_content(content):
+    """Tek içeriği indekse yaz (varsa güncelle). Commit çağırana aittir."""
+    db.session.execute(
+        _UPSERT_SQL,
+        _fts_row(content.id, content.title, content.year, content.meta_json),
+    )
+
+
+def index_rows(rows):
+    """(id, title, year, meta_json) demetlerini toplu olarak indekse yaz."""
+    params = [_fts_row(*row) for row in rows]
+    if params:
+        db.session.execute(_UPSERT_SQL, params)
+    return len(params)
+
+
+def rebuild_search_index(batch_size=2000):
+    """content_fts'i contents tablosundan baştan oluştur."""
+    db.session.execute(text(CONTENT_FTS_DDL))
+    db.session.execute(text("DELETE FROM content_fts"))
+
+    total = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.session.query(Content.id, Content.title, Content.year, Content.meta_json)
+            .filter(Content.id > last_id)
+            .order_by(Content.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        total += index_rows(rows)
+        last_id = rows[-1][0]
+
+    db.session.execute(text("INSERT INTO content_fts(content_fts) VALUES ('optimize')"))
+    db.session.commit()
+    return total
+
+
+def build_match_query(q):
+    """
+    Kullanıcı girdisini FTS5 MATCH ifadesine çevir: her kelime önek olarak
+    aranır ve hepsi eşleşmelidir ("dun vil" -> "dun"* "vil"*).
+    Tırnaklama FTS5 sözdizimi karakterlerini etkisiz bırakır.
+    """
+    tokens = _TOKEN_RE.findall(fold_text(q))
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def search_contents(q, limit=50):
+    """BM25'e göre sıralı en fazla `limit` içerik döndürür."""
+    match = build_match_query(q)
+    if not match:
+        return []
+
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    ids = [
+        row[0]
+        for row in db.session.execute(
+            text(
+                "SELECT rowid FROM content_fts WHERE content_fts MATCH :match "
+                f"ORDER BY bm25(content_fts, {weights}) LIMIT :limit"
+            ),
+            {"match": match, "limit": limit},
+        )
+    ]
+    if not ids:
+        return []
+
+    by_id = {c.id: c for c in Content.query.filter(Content.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id]
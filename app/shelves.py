@@ -0,0 +1,175 @@
+"""
+Profil sayfasındaki kütüphane rafları (izlenen / izlenecek / okunan / okunacak).
+
+Her varsayılan liste UserList.shelf ile hangi rafa ait olduğunu açıkça
+belirtir. Profil sayfası dört rafın ilk N öğesini tek bir pencereli
+(ROW_NUMBER) sorguyla, içerikleriyle birlikte yükler; rafın tamamı
+sayfalı ayrı bir sayfada gösterilir.
+"""
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy.schema import CreateIndex
+
+from .models import db, UserList, ListItem, Content
+from .pagination import encode_cursor, decode_time_cursor, keyset_page
+
+# raf -> (başlık, liste türü); profil sayfasındaki sıra
+SHELVES = {
+    "watched": ("İzlenen Filmler", "watch"),
+    "watchlist": ("İzlenecek Filmler", "watch"),
+    "read": ("Okunan Kitaplar", "read"),
+    "toread": ("Okunacak Kitaplar", "read"),
+}
+
+# Kayıtta oluşturulan varsayılan listeler: (ad, liste türü, raf)
+DEFAULT_LISTS = (
+    ("İzlenecek Filmler", "watch", "watchlist"),
+    ("İzlenen Filmler", "watch", "watched"),
+    ("Okunacak Kitaplar", "read", "toread"),
+    ("Okunan Kitaplar", "read", "read"),
+)
+
+# Raf rolü olmayan eski listeler için ad eşleştirmesi (ilk eşleşen kazanır)
+_NAME_HINTS = {
+    "watch": (("watchlist", ("izlenecek", "to watch", "watchlist")),
+              ("watched", ("izlenen", "izlediklerim", "watched"))),
+    "read": (("toread", ("okunacak", "to read")),
+             ("read", ("okunan", "okuduklarım", "read"))),
+}
+
+SHELF_PREVIEW_SIZE = 20
+SHELF_PAGE_SIZE = 48
+
+
+def default_lists_for(user):
+    return [
+        UserList(user_id=user.id, name=name, list_type=list_type, is_default=True, shelf=shelf)
+        for name, list_type, shelf in DEFAULT_LISTS
+    ]
+
+
+def _guess_shelves(lists):
+    """
+    Bir kullanıcının aynı türdeki varsayılan listelerine raf ata: önce ada
+    göre, eşleşmezse sırayla (1. liste = izlenecek/okunacak, 2. = izlenen/okunan).
+    """
+    by_type = {}
+    for lst in lists:
+        by_type.setdefault(lst.list_type, []).append(lst)
+
+    assigned = {}
+    for list_type, hints in _NAME_HINTS.items():
+        candidates = by_type.get(list_type, [])
+        for shelf, words in hints:
+            for lst in candidates:
+                name = (lst.name or "").lower()
+                if lst.id not in assigned and any(w in name for w in words):
+                    assigned[lst.id] = shelf
+                    break
+        taken = set(assigned.values())
+        free = [lst for lst in candidates if lst.id not in assigned]
+        for (shelf, _), lst in zip(hints, free):
+            if shelf not in taken:
+                assigned[lst.id] = shelf
+    return assigned
+
+
+def ensure_shelf_column():
+    """Eski veritabanlarında user_lists.shelf sütununu ve indeksini ekle."""
+    columns = {row[1] for row in db.session.execute(text("PRAGMA table_info(user_lists)"))}
+    if "shelf" not in columns:
+        db.session.execute(text("ALTER TABLE user_lists ADD COLUMN shelf VARCHAR(20)"))
+    for index in UserList.__table__.indexes:
+        db.session.execute(CreateIndex(index, if_not_exists=True))
+
+
+def backfill_shelves():
+    """
+    Raf rolü olmayan kullanıcıların varsayılan listelerine rol ata.
+    Dönen: (kullanıcı sayısı, güncellenen liste sayısı)
+    """
+    ensure_shelf_column()
+    users_without = (
+        select(UserList.user_id)
+        .where(UserList.is_default.is_(True))
+        .group_by(UserList.user_id)
+        .having(func.count(UserList.shelf) == 0)
+    )
+    updated = 0
+    user_ids = [row[0] for row in db.session.execute(users_without)]
+    for user_id in user_ids:
+        lists = (
+            UserList.query
+            .filter_by(user_id=user_id, is_default=True)
+            .order_by(UserList.id)
+            .all()
+        )
+        guessed = _guess_shelves(lists)
+        for lst in lists:
+            shelf = guessed.get(lst.id)
+            if shelf:
+                lst.shelf = shelf
+                updated += 1
+    db.session.commit()
+    return len(user_ids), updated
+
+
+def load_shelves(user, per_shelf=SHELF_PREVIEW_SIZE):
+    """
+    {raf: {"title", "items": [Content, ...], "total": int}}
+    Tek sorgu: her raftan en son eklenen per_shelf içerik + raftaki toplam sayı.
+    """
+    ranked = (
+        select(
+            ListItem.content_id,
+            UserList.shelf,
+            func.row_number().over(
+                partition_by=ListItem.list_id,
+                order_by=(ListItem.added_at.desc(), ListItem.id.desc()),
+            ).label("position"),
+            func.count().over(partition_by=ListItem.list_id).label("total"),
+        )
+        .join(UserList, UserList.id == ListItem.list_id)
+        .where(UserList.user_id == user.id, UserList.shelf.isnot(None))
+        .subquery()
+    )
+    content = aliased(Content, name="content")
+    rows = db.session.execute(
+        select(ranked.c.shelf, ranked.c.total, content)
+        .join(content, content.id == ranked.c.content_id)
+        .where(ranked.c.position <= per_shelf)
+        .order_by(ranked.c.shelf, ranked.c.position)
+    ).all()
+
+    shelves = {
+        shelf: {"title": title, "items": [], "total": 0}
+        for shelf, (title, _) in SHELVES.items()
+    }
+    for shelf, total, item in rows:
+        if shelf in shelves:
+            shelves[shelf]["items"].append(item)
+            shelves[shelf]["total"] = total
+    return shelves
+
+
+def shelf_page(user, shelf, cursor=None, limit=SHELF_PAGE_SIZE):
+    """Rafın bir sayfası: (ListItem listesi, sonraki cursor | None); raf yoksa None."""
+    user_list = UserList.query.filter_by(user_id=user.id, shelf=shelf).first()
+    if user_list is None:
+        return None
+
+    query = (
+        ListItem.query
+        .options(joinedload(ListItem.content))
+        .filter(ListItem.list_id == user_list.id)
+    )
+    after = decode_time_cursor(cursor)
+    if after:
+        query = query.filter(tuple_(ListItem.added_at, ListItem.id) < after)
+    items, has_next = keyset_page(
+        query.order_by(ListItem.added_at.desc(), ListItem.id.desc()), limit
+    )
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(items[-1].added_at, items[-1].id)
+    return items, next_cursor
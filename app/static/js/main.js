@@ -24,14 +24,14 @@ document.addEventListener("DOMContentLoaded", function () {
 
   if (loadBtn && grid && container) {
     loadBtn.addEventListener("click", function () {
-      const nextPage = this.dataset.nextPage;
+      const nextCursor = this.dataset.nextCursor;
       const urlBase = this.dataset.url;
-      if (!nextPage || !urlBase) return;
+      if (!nextCursor || !urlBase) return;
 
       this.disabled = true;
       this.textContent = "Yükleniyor...";
 
-      fetch(`${urlBase}?page=${nextPage}`)
+      fetch(`${urlBase}?cursor=${encodeURIComponent(nextCursor)}`)
         .then((resp) => resp.json())
         .then((data) => {
           if (data.html) {
@@ -42,8 +42,8 @@ document.addEventListener("DOMContentLoaded", function () {
             });
           }
 
-          if (data.has_next) {
-            loadBtn.dataset.nextPage = data.next_page;
+          if (data.next_cursor) {
+            loadBtn.dataset.nextCursor = data.next_cursor;
             loadBtn.disabled = false;
             loadBtn.textContent = "Daha Fazla Yükle";
           } else {
@@ -61,6 +61,66 @@ document.addEventListener("DOMContentLoaded", function () {
 });
 
 
+// Katalog listeleri: sonsuz kaydırma (buton görünür olunca otomatik yükler)
+document.addEventListener("DOMContentLoaded", function () {
+  const loadBtn = document.getElementById("load-more-catalog");
+  const grid = document.getElementById("catalog-grid");
+  const container = document.getElementById("catalog-more-container");
+  if (!loadBtn || !grid || !container) return;
+
+  let loading = false;
+
+  function loadMore() {
+    const nextCursor = loadBtn.dataset.nextCursor;
+    const urlBase = loadBtn.dataset.url;
+    if (loading || !nextCursor || !urlBase) return;
+
+    loading = true;
+    loadBtn.disabled = true;
+    loadBtn.textContent = "Yükleniyor...";
+
+    fetch(`${urlBase}?cursor=${encodeURIComponent(nextCursor)}`)
+      .then((resp) => resp.json())
+      .then((data) => {
+        if (data.html) {
+          const temp = document.createElement("div");
+          temp.innerHTML = data.html;
+          temp.querySelectorAll(".col").forEach((col) => {
+            grid.appendChild(col);
+          });
+        }
+
+        if (data.next_cursor) {
+          loadBtn.dataset.nextCursor = data.next_cursor;
+          loadBtn.disabled = false;
+          loadBtn.textContent = "Daha Fazla Yükle";
+        } else {
+          container.innerHTML = "";
+        }
+      })
+      .catch((err) => {
+        console.error("Catalog load error", err);
+        loadBtn.disabled = false;
+        loadBtn.textContent = "Tekrar dene";
+      })
+      .finally(() => {
+        loading = false;
+      });
+  }
+
+  loadBtn.addEventListener("click", loadMore);
+
+  if ("IntersectionObserver" in window) {
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries.some((entry) => entry.isIntersecting)) loadMore();
+      },
+      { rootMargin: "400px" }
+    );
+    observer.observe(container);
+  }
+});
+
 document.addEventListener("click", function (e) {
   // Beğen butonu
   const likeBtn = e.target.closest(".activity-like-btn");
@@ -135,3 +195,53 @@ document.addEventListener("submit", function (e) {
       .catch((err) => console.error("comment error", err));
   }
 });
+
+// Yazarken arama önerileri: her tuşta değil, yazma durunca (debounce) istek at
+document.addEventListener("DOMContentLoaded", function () {
+  const DEBOUNCE_MS = 150;
+
+  document.querySelectorAll("input[data-autocomplete-url]").forEach(function (input) {
+    const list = document.getElementById(input.getAttribute("list"));
+    if (!list) return;
+
+    let timer = null;
+    let controller = null;
+    let lastQuery = "";
+
+    input.addEventListener("input", function () {
+      clearTimeout(timer);
+      const q = input.value.trim();
+      if (q.length < 2) {
+        list.innerHTML = "";
+        lastQuery = "";
+        return;
+      }
+
+      timer = setTimeout(function () {
+        if (q === lastQuery) return;
+        lastQuery = q;
+
+        // Önceki yanıt gelmediyse iptal et; eski sonuçlar yenilerin üstüne yazmasın
+        if (controller) controller.abort();
+        controller = new AbortController();
+
+        const url = new URL(input.dataset.autocompleteUrl, window.location.origin);
+        url.searchParams.set("q", q);
+
+        fetch(url, { signal: controller.signal })
+          .then((r) => r.json())
+          .then((data) => {
+            list.innerHTML = "";
+            data.results.forEach(function (item) {
+              const opt = document.createElement("option");
+              opt.value = item.value;
+              list.appendChild(opt);
+            });
+          })
+          .catch((err) => {
+            if (err.name !== "AbortError") console.error("autocomplete error", err);
+          });
+      }, DEBOUNCE_MS);
+    });
+  });
+});
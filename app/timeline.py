@@ -0,0 +1,244 @@
+"""
+Ana sayfa akışı (home timeline).
+
+Bir aktivite oluşturulduğunda yazarın ve takipçilerinin timeline_entries
+kayıtlarına yazılır (fan-out-on-write); akış sayfası tek bir indeksli
+aralık taramasıyla okunur. TIMELINE_FANOUT_LIMIT'ten fazla takipçisi olan
+hesapların aktiviteleri takipçilere kopyalanmaz, okuma sırasında eklenir.
+
+Takipçi akışlarının budanması ve takipçi sayısı sınırın altına inen
+hesabın son aktivitelerinin takipçilere yeniden yazılması arka plan
+işleridir (bkz. jobs.py); kullanıcının isteği tek yazıcı bağlantıyı
+binlerce akış için tutmaz.
+"""
+from flask import current_app
+from sqlalchemy import select, literal, delete, or_, tuple_, true
+
+from .models import db, User, Follow, Activity, TimelineEntry
+from .jobs import handler, enqueue, has_pending, wake_worker_after_commit
+
+TRIM_FOLLOWERS = "timeline_trim_followers"
+REFILL_FOLLOWERS = "timeline_refill_followers"
+
+# Takipçi akışları her bu kadar aktivitede bir budanır (yazarınki her seferinde)
+TRIM_INTERVAL = 32
+# İşlerde takipçiler bu büyüklükte gruplar halinde işlenir, her grup ayrı transaction
+FOLLOWER_BATCH = 200
+
+_COLUMNS = ["owner_id", "activity_id", "actor_id", "created_at"]
+
+
+def _max_entries():
+    return current_app.config.get("TIMELINE_MAX_ENTRIES", 800)
+
+
+def _fanout_limit():
+    return current_app.config.get("TIMELINE_FANOUT_LIMIT", 5000)
+
+
+def _insert_ignore(select_stmt):
+    stmt = (
+        TimelineEntry.__table__.insert()
+        .prefix_with("OR IGNORE")
+        .from_select(_COLUMNS, select_stmt)
+    )
+    db.session.execute(stmt)
+
+
+def pull_user_ids(user_ids):
+    """user_ids içinden akışı okuma sırasında çekilecek (çok takipçili) hesaplar."""
+    if not user_ids:
+        return []
+    rows = (
+        db.session.query(User.id)
+        .filter(User.id.in_(user_ids), User.follower_count > _fanout_limit())
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def trim_timeline(owner_id):
+    """Kullanıcının akışında en yeni TIMELINE_MAX_ENTRIES kaydı bırak."""
+    t = TimelineEntry.__table__
+    # Sınır kaydı (owner_id, created_at, activity_id) indeksinden bulunur
+    cutoff = db.session.execute(
+        select(t.c.created_at, t.c.activity_id)
+        .where(t.c.owner_id == owner_id)
+        .order_by(t.c.created_at.desc(), t.c.activity_id.desc())
+        .limit(1)
+        .offset(_max_entries())
+    ).first()
+    if cutoff is None:
+        return
+    db.session.execute(
+        delete(t).where(
+            t.c.owner_id == owner_id,
+            tuple_(t.c.created_at, t.c.activity_id) <= tuple(cutoff),
+        )
+    )
+
+
+def _follower_batches(user_id):
+    """Takipçi id'leri, FOLLOWER_BATCH'lik gruplar halinde (id sırasıyla)."""
+    after = 0
+    while True:
+        batch = [
+            fid for (fid,) in db.session.execute(
+                select(Follow.follower_id)
+                .where(Follow.followed_id == user_id, Follow.follower_id > after)
+                .order_by(Follow.follower_id)
+                .limit(FOLLOWER_BATCH)
+            )
+        ]
+        if not batch:
+            return
+        yield batch
+        after = batch[-1]
+
+
+def _enqueue_once(kind, user_id):
+    if not has_pending(kind, user_id):
+        enqueue(kind, {"user_id": user_id}, ref_id=user_id)
+        wake_worker_after_commit()
+
+
+def fan_out_activity(act):
+    """Yeni (flush edilmiş) aktiviteyi yazarın ve takipçilerinin akışına ekle."""
+    created_at = literal(act.created_at, db.DateTime)
+
+    _insert_ignore(
+        select(literal(act.user_id), literal(act.id), literal(act.user_id), created_at)
+    )
+
+    if not pull_user_ids([act.user_id]):
+        _insert_ignore(
+            select(Follow.follower_id, literal(act.id), literal(act.user_id), created_at)
+            .where(Follow.followed_id == act.user_id)
+        )
+        if act.id % TRIM_INTERVAL == 0:
+            _enqueue_once(TRIM_FOLLOWERS, act.user_id)
+
+    trim_timeline(act.user_id)
+
+
+@handler(TRIM_FOLLOWERS)
+def trim_follower_timelines(payload):
+    """Yazarın takipçilerinin akışlarını buda."""
+    for batch in _follower_batches(payload["user_id"]):
+        for owner_id in batch:
+            trim_timeline(owner_id)
+        db.session.commit()
+
+
+def follower_count_changed(user, follower_count, delta):
+    """
+    Takipçi sayısı fan-out sınırının altına indiyse (okuma sırasında çekilmeyi
+    bırakıyorsa) son aktivitelerinin takipçi akışlarına yazılmasını kuyruğa al.
+    Sınırın üstündeyken bu aktiviteler akışlara yazılmamıştı.
+    """
+    if delta < 0 and follower_count == _fanout_limit():
+        _enqueue_once(REFILL_FOLLOWERS, user.id)
+
+
+@handler(REFILL_FOLLOWERS)
+def refill_follower_timelines(payload):
+    """Yazarın son aktivitelerini tüm takipçilerinin akışına ekle."""
+    user_id = payload["user_id"]
+    if pull_user_ids([user_id]):
+        return  # bu arada yeniden sınırın üstüne çıktı
+    recent = (
+        select(Activity.id, Activity.created_at)
+        .where(Activity.user_id == user_id)
+        .order_by(Activity.created_at.desc())
+        .limit(_max_entries())
+        .subquery()
+    )
+    for batch in _follower_batches(user_id):
+        _insert_ignore(
+            select(Follow.follower_id, recent.c.id, literal(user_id), recent.c.created_at)
+            .join_from(Follow, recent, true())  # her takipçi × son aktiviteler
+            .where(Follow.followed_id == user_id, Follow.follower_id.in_(batch))
+        )
+        for owner_id in batch:
+            trim_timeline(owner_id)
+        db.session.commit()
+
+
+def backfill_timeline(follower, followed):
+    """Yeni takip: takip edilenin son aktivitelerini takipçinin akışına ekle."""
+    if pull_user_ids([followed.id]):
+        return
+
+    _insert_ignore(
+        select(literal(follower.id), Activity.id, Activity.user_id, Activity.created_at)
+        .where(Activity.user_id == followed.id)
+        .order_by(Activity.created_at.desc())
+        .limit(_max_entries())
+    )
+    trim_timeline(follower.id)
+
+
+def prune_timeline(follower, followed):
+    """Takipten çıkma: takip edilenin aktivitelerini takipçinin akışından sil."""
+    db.session.execute(
+        delete(TimelineEntry.__table__).where(
+            TimelineEntry.owner_id == follower.id,
+            TimelineEntry.actor_id == followed.id,
+        )
+    )
+
+
+def timeline_query(user, followed_ids, before=None):
+    """
+    Kullanıcının akışı için Activity sorgusu (yeniden eskiye).
+    followed_ids: kullanıcının kendisi + takip ettikleri.
+    before: (created_at, activity_id) keyset cursor'ı; bu noktadan eskiler döner.
+    """
+    pull_ids = pull_user_ids([uid for uid in followed_ids if uid != user.id])
+
+    if not pull_ids:
+        q = (
+            Activity.query
+            .join(TimelineEntry, TimelineEntry.activity_id == Activity.id)
+            .filter(TimelineEntry.owner_id == user.id)
+            .order_by(TimelineEntry.created_at.desc(), TimelineEntry.activity_id.desc())
+        )
+        if before:
+            q = q.filter(tuple_(TimelineEntry.created_at, TimelineEntry.activity_id) < before)
+        return q
+
+    inbox = select(TimelineEntry.activity_id).where(TimelineEntry.owner_id == user.id)
+    q = (
+        Activity.query
+        .filter(or_(Activity.id.in_(inbox), Activity.user_id.in_(pull_ids)))
+        .order_by(Activity.created_at.desc(), Activity.id.desc())
+    )
+    if before:
+        q = q.filter(tuple_(Activity.created_at, Activity.id) < before)
+    return q
+
+
+def rebuild_timelines(user_ids=None):
+    """Akışları activities + follow tablolarından sıfırdan oluştur."""
+    if user_ids is None:
+        user_ids = [uid for (uid,) in db.session.query(User.id).all()]
+
+    for uid in user_ids:
+        db.session.execute(
+            delete(TimelineEntry.__table__).where(TimelineEntry.owner_id == uid)
+        )
+        followed = [
+            fid for (fid,) in db.session.query(Follow.followed_id)
+            .filter(Follow.follower_id == uid)
+        ]
+        pushed = set(followed) - set(pull_user_ids(followed))
+        pushed.add(uid)
+        _insert_ignore(
+            select(literal(uid), Activity.id, Activity.user_id, Activity.created_at)
+            .where(Activity.user_id.in_(pushed))
+            .order_by(Activity.created_at.desc())
+            .limit(_max_entries())
+        )
+        db.session.commit()
+
+    return len(user_ids)
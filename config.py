@@ -9,3 +9,74 @@ class Config:
     SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(BASE_DIR, "sosyal_kutuphane.db")
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # /health/* uçları için izleme anahtarı (X-Health-Token başlığı); yoksa oturum gerekir
+    HEALTH_TOKEN = os.environ.get("HEALTH_TOKEN")
+
+    # Ana sayfa akışı: kullanıcı başına tutulan en fazla kayıt sayısı
+    TIMELINE_MAX_ENTRIES = 800
+    # Bu sayıdan fazla takipçisi olanların aktiviteleri takipçilere yazılmaz,
+    # okuma sırasında çekilir (fan-out-on-read)
+    TIMELINE_FANOUT_LIMIT = 5000
+
+    # Popüler kullanıcılar listesinin süreç içi önbellek süresi (saniye)
+    LEADERBOARD_TTL = 60
+
+    # Birleşik arama: sorgulanan kaynaklar, thread havuzu ve kaynak başına süre sınırı (sn)
+    FEDERATED_SEARCH_SOURCES = ("local", "tmdb", "openlibrary")
+    FEDERATED_SEARCH_WORKERS = 8
+    SEARCH_SOURCE_TIMEOUT = 2.5
+    SEARCH_SOURCE_TIMEOUTS = {}  # ör. {"openlibrary": 4.0}
+
+    # Yazarken arama indeksi: açılışta arka planda kurulur, bu aralıkla (saniye) yenilenir
+    AUTOCOMPLETE_PRELOAD = True   # False ise ilk kullanımda (istek içinde) kurulur
+    AUTOCOMPLETE_TTL = 300
+
+    # Arka plan iş kuyruğu (bkz. app/jobs.py)
+    JOBS_WORKER_THREAD = True    # False ise işleri `flask run-worker` süreci çalıştırır
+    JOB_MAX_ATTEMPTS = 5
+    JOB_RETRY_BACKOFF = 60       # ilk yeniden deneme gecikmesi (sn), her denemede iki katı
+    JOB_LEASE_SECONDS = 300      # çalışırken ölen worker'ın işi bu süre sonra geri döner
+    JOB_POLL_INTERVAL = 5
+    JOB_RETENTION_DAYS = 7       # "done" işler bu kadar gün sonra silinir
+    JOB_PURGE_INTERVAL = 3600    # worker eski işleri en fazla bu sıklıkla (sn) siler
+
+    # SQLite motor profili (bkz. app/db_engine.py)
+    SQLITE_ENGINE_PROFILE = True
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "busy_timeout": 5000,          # ms; başka süreç yazarken bekle
+        "synchronous": "NORMAL",       # WAL ile güvenli, her commit'te fsync yok
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,      # KiB cinsinden (64 MB)
+        "temp_store": "MEMORY",
+    }
+    SQLITE_WRITE_POOL_SIZE = 1         # süreç başına tek yazıcı bağlantı
+    SQLITE_READ_POOL_SIZE = 8          # GET istekleri için query_only bağlantılar; 0 = kapalı
+    SQLITE_POOL_TIMEOUT = 30
+    SQLITE_BEGIN_IMMEDIATE = True
+
+    # Render edilmiş HTML parçaları için süreç içi önbellek (bayt)
+    FRAGMENT_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+    # Takip grafiği önbelleği (bkz. app/follow_graph.py)
+    FOLLOW_GRAPH_MAX_IDS = 2_000_000       # süreç başına tutulan en fazla id (~16 MB)
+    FOLLOW_GRAPH_SYNC_INTERVAL = 1.0       # diğer süreçlerin değişikliklerini kontrol aralığı (sn)
+
+    # Kimlik önbelleği (bkz. app/identity.py)
+    USER_CACHE_TTL = 60                    # diğer süreçlerdeki profil düzenlemeleri en fazla bu kadar eski görünür (sn)
+    USER_CACHE_SIZE = 10_000
+
+    # Koşullu GET (bkz. app/conditional.py): ETag'in zaman dilimi (sn)
+    CONDITIONAL_GET_BUCKET = 60
+
+    # Derlenmiş statik dosyaların önbellek süresi (bkz. app/assets.py)
+    ASSETS_MAX_AGE = 365 * 24 * 3600
+
+    # Görsel vekili (bkz. app/image_proxy.py)
+    IMAGE_PROXY_ENABLED = True
+    IMAGE_PROXY_HOSTS = ("image.tmdb.org", "covers.openlibrary.org", "i.pravatar.cc")
+    IMAGE_CACHE_DIR = None                         # None: instance/image_cache
+    IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    IMAGE_PROXY_MAX_SOURCE_BYTES = 8 * 1024 * 1024
+    IMAGE_PROXY_MAX_AGE = 30 * 24 * 3600
@@ -0,0 +1,79 @@
+"""
+Test ortak ayarları: her test geçici bir SQLite dosyasıyla yeni bir uygulama
+alır. Süreç içi önbellekler (parça, takip grafiği, kimlik, liderlik tablosu,
+yazarken arama, görsel önbelleği boyutu) testler arasında sıfırlanır.
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from config import Config
+from app import create_app
+from app.models import db
+
+
+def _reset_process_caches():
+    from app import autocomplete, follow_graph, image_proxy, leaderboard
+    from app.fragment_cache import fragment_cache
+
+    fragment_cache.clear()
+    follow_graph._state.update(last_log_id=None, synced_at=0.0)
+    follow_graph._clear()
+    leaderboard._state.update(entries=[], complete=False, loaded_at=None)
+    autocomplete._state["index"] = None
+    image_proxy._state["bytes"] = None
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+        JOBS_WORKER_THREAD = False
+        FEDERATED_SEARCH_SOURCES = ("local",)
+        AUTOCOMPLETE_PRELOAD = False
+        FOLLOW_GRAPH_SYNC_INTERVAL = 3600  # tek süreç: günlük eşitlemesi sorgu sayısını oynatmasın
+        IMAGE_CACHE_DIR = str(tmp_path / "image_cache")
+
+    _reset_process_caches()
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    _reset_process_caches()
+
+
+@pytest.fixture
+def seeded(app):
+    """Route'lar üzerinden örnek veri (bkz. query_audit.seed_sample_data): (client'lar, içerik id'leri)"""
+    from app.query_audit import seed_sample_data
+
+    return seed_sample_data(app)
+
+
+@pytest.fixture
+def count_queries(app):
+    """with count_queries() as statements: ... — tüm motorlarda çalışan SQL ifadeleri."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", capture)
+        try:
+            yield statements
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", capture)
+
+    return counter
@@ -0,0 +1,72 @@
+"""Koşullu GET: eşleşen If-None-Match ile 304 döner ve sayfa hiç render edilmez."""
+import pytest
+from flask import template_rendered
+
+from app.feed import routes as feed_routes
+
+
+@pytest.fixture
+def alice(seeded):
+    clients, content_ids = seeded
+    client = clients["alice"]
+    client.get("/")  # bekleyen flash mesajlarını tüket (mesaj varken ETag üretilmez)
+    return client, content_ids
+
+
+@pytest.fixture
+def rendered(app):
+    templates = []
+
+    def record(sender, template, context, **extra):
+        templates.append(template.name)
+
+    template_rendered.connect(record, app)
+    yield templates
+    template_rendered.disconnect(record, app)
+
+
+def _assert_not_modified(client, path, rendered, monkeypatch):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("304 yolunda kartlar hazırlanmamalı")
+
+    monkeypatch.setattr(feed_routes, "_build_activity_cards", fail)
+    rendered.clear()
+    second = client.get(path, headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.data == b""
+    assert rendered == []
+
+
+def test_feed_more_not_modified(alice, rendered, monkeypatch):
+    client, _ = alice
+    _assert_not_modified(client, "/more", rendered, monkeypatch)
+
+
+def test_content_detail_not_modified(alice, rendered, monkeypatch):
+    client, content_ids = alice
+    _assert_not_modified(client, f"/content/{content_ids[0]}", rendered, monkeypatch)
+
+
+def test_catalog_not_modified(alice, rendered, monkeypatch):
+    client, _ = alice
+    _assert_not_modified(client, "/movies/top-rated", rendered, monkeypatch)
+
+
+def test_changed_page_is_rendered_again(alice, rendered):
+    client, content_ids = alice
+    path = f"/content/{content_ids[0]}"
+    etag = client.get(path).headers["ETag"]
+
+    client.post(path, data={"score": "2"})
+    client.get(path)  # flash mesajını tüket
+    rendered.clear()
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert "content/detail.html" in rendered
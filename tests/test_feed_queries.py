@@ -0,0 +1,48 @@
+"""Akış sayfalarının sorgu sayısı sayfadaki kart sayısından bağımsız olmalı."""
+from app.feed import routes as feed_routes
+from app.fragment_cache import fragment_cache
+
+
+def _statement_counts(client, count_queries):
+    # Oturum kullanıcısı, takip grafiği ve liderlik tablosu önbelleği ısınsın;
+    # kart parçaları ise her ölçümde soğuk başlasın
+    client.get("/")
+    fragment_cache.clear()
+    with count_queries() as index_statements:
+        response = client.get("/")
+    assert response.status_code == 200
+
+    cursor = client.get("/more").get_json()["next_cursor"]
+    assert cursor
+    fragment_cache.clear()
+    with count_queries() as more_statements:
+        response = client.get(f"/more?cursor={cursor}")
+    assert response.status_code == 200
+    assert response.get_json()["html"]
+    return len(index_statements), len(more_statements)
+
+
+def test_feed_query_count_is_constant(seeded, count_queries, monkeypatch):
+    clients, _ = seeded
+    client = clients["alice"]
+
+    counts = []
+    for size in (6, 24):
+        monkeypatch.setattr(feed_routes, "PER_PAGE", size)
+        counts.append(_statement_counts(client, count_queries))
+
+    assert counts[0] == counts[1], counts
+
+
+def test_cached_cards_skip_hydration_queries(seeded, count_queries):
+    clients, _ = seeded
+    client = clients["alice"]
+
+    client.get("/")
+    fragment_cache.clear()
+    with count_queries() as cold:
+        client.get("/")
+    with count_queries() as warm:
+        client.get("/")
+
+    assert len(warm) < len(cold)
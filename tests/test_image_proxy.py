@@ -0,0 +1,116 @@
+"""Görsel vekili, thread'de çalışan yerel bir http.server'a karşı."""
+import io
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from app.external_api import image_upstream
+from app.image_proxy import SIZES
+
+
+def _jpeg(width, height):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def upstream():
+    """Yerel görsel sunucusu: /broken* 500 döner, diğerleri 1200x1800 JPEG."""
+    body = _jpeg(1200, 1800)
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path.startswith("/broken"):
+                self.send_response(500)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_port}", hits
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(app, upstream):
+    host, _ = upstream
+    app.config["IMAGE_PROXY_HOSTS"] = (host,)
+    return app.test_client()
+
+
+def _cached_files(app):
+    root = app.config["IMAGE_CACHE_DIR"]
+    return [os.path.join(d, f) for d, _, files in os.walk(root) for f in files]
+
+
+def test_first_fetch_resizes_and_caches(app, client, upstream):
+    host, hits = upstream
+    response = client.get("/img/thumb", query_string={"u": f"http://{host}/poster.jpg"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/jpeg"
+    assert Image.open(io.BytesIO(response.data)).size == SIZES["thumb"][:2]
+    assert hits == ["/poster.jpg"]
+    assert len(_cached_files(app)) == 1
+
+
+def test_second_fetch_is_served_from_disk(app, client, upstream):
+    host, hits = upstream
+    url = f"http://{host}/poster.jpg"
+    first = client.get("/img/thumb", query_string={"u": url})
+    second = client.get("/img/thumb", query_string={"u": url})
+
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert hits == ["/poster.jpg"]
+
+
+def test_upstream_error_redirects_to_original(app, client, upstream):
+    host, _ = upstream
+    url = f"http://{host}/broken.jpg"
+    response = client.get("/img/thumb", query_string={"u": url})
+
+    assert response.status_code == 302
+    assert response.headers["Location"] == url
+    assert _cached_files(app) == []
+
+
+def test_open_breaker_is_per_host(app, client, upstream):
+    host, hits = upstream
+    other = host.replace("127.0.0.1", "localhost")
+    app.config["IMAGE_PROXY_HOSTS"] = (host, other)
+
+    broken = image_upstream(f"http://{host}/").breaker
+    for _ in range(broken.failure_threshold):
+        broken.record_failure()
+    assert broken.state == "open"
+
+    url = f"http://{host}/poster.jpg"
+    response = client.get("/img/thumb", query_string={"u": url})
+    assert response.status_code == 302
+    assert response.headers["Location"] == url
+
+    response = client.get("/img/thumb", query_string={"u": f"http://{other}/poster.jpg"})
+    assert response.status_code == 200
+    assert hits == ["/poster.jpg"]
+
+
+def test_unlisted_host_is_not_proxied(client):
+    response = client.get("/img/thumb", query_string={"u": "http://example.com/x.jpg"})
+    assert response.status_code == 404
@@ -0,0 +1,27 @@
+"""Biten işlerin temizliği: yalnızca saklama süresini geçen "done" işler silinir."""
+from datetime import datetime, timedelta
+
+from app import jobs
+from app.models import db, Job
+
+
+def _job(status, finished_days_ago):
+    return Job(
+        kind="test",
+        payload="{}",
+        status=status,
+        finished_at=datetime.utcnow() - timedelta(days=finished_days_ago),
+    )
+
+
+def test_purge_keeps_recent_failed_and_pending_jobs(app, monkeypatch):
+    monkeypatch.setattr(jobs, "PURGE_BATCH", 2)  # birden fazla grup
+    with app.app_context():
+        old_done = [_job("done", 10) for _ in range(5)]
+        kept = [_job("done", 1), _job("failed", 10), Job(kind="test", payload="{}")]
+        db.session.add_all(old_done + kept)
+        db.session.commit()
+        kept_ids = {job.id for job in kept}
+
+        assert jobs.purge_finished_jobs(7) == 5
+        assert {job_id for (job_id,) in db.session.query(Job.id)} == kept_ids